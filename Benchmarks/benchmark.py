@@ -0,0 +1,216 @@
+"""
+Benchmarks the Billit, Erelonen and Rappels conversions on synthetic workbooks.
+
+Every run generates (or reuses) input workbooks of the requested sizes together with a matching
+relatiecodes.csv, converts them headlessly and times each pipeline stage. The results are appended to a
+JSON lines file so they can be compared over time:
+
+    python Benchmarks/benchmark.py --sizes 1000 10000 100000 --types billit erelonen rappels
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from datetime import datetime, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import converter  # noqa: E402
+import readers  # noqa: E402
+
+CONVERSION_TYPES = {"billit": "Billit", "erelonen": "Erelonen", "rappels": "Rappels"}
+RESULTS_FILE = os.path.join(REPO_DIR, "Benchmarks", "benchmark_results.jsonl")
+WORK_DIR = os.path.join(REPO_DIR, "Benchmarks", "work")
+
+BENCHMARK_YEAR = 2024
+BENCHMARK_MONTH = 3
+RELATIECODE_PREFIXES = ["H", "D", "L", "G", "R"]
+TOTALS = [(121.0, 100.0), (106.0, 100.0), (112.0, 100.0), (100.0, 100.0)]
+
+
+def company_name(i):
+    return f"Bedrijf {i:05d} BV"
+
+
+def building_name(i):
+    return f"Résidentie {i:05d}"
+
+
+def relatiecode(i):
+    return f"{RELATIECODE_PREFIXES[i % len(RELATIECODE_PREFIXES)]}{i:05d}"
+
+
+def distinct_names(rows):
+    """Number of distinct companies and buildings for a workbook of the given size."""
+    return max(10, min(rows // 10, 20000))
+
+
+def write_relatiecodes(path, names):
+    """Writes a relatiecodes.csv that knows every synthetic company and building name."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Name;Relatiecode\n")
+        for i in range(names):
+            f.write(f"{company_name(i)};{relatiecode(i)}\n")
+            # The accented building names are found through their clean_text form, like the company names
+            f.write(f"{building_name(i)};{relatiecode(i)}\n")
+
+
+def write_grootboekrekeningen(path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Code;Grootboekrekening\n")
+
+
+def billit_rows(rows, names, rng):
+    yield ["Order nummer", "Datum", "Vervaldag", "Bedrijf", "Totaal inclusief", "Totaal exclusief", "Betreft",
+           "Factuurnr"]
+    start = datetime(BENCHMARK_YEAR, 1, 1)
+    for i in range(rows):
+        prefix, sign = ("CN1", -1) if i % 20 == 0 else ("VK", 1)
+        tebetalen, basisbedrag = TOTALS[i % len(TOTALS)]
+        datum = start + timedelta(days=i % 365)
+        yield [f"{prefix}-{BENCHMARK_YEAR}-{i + 1:06d}", datum, datum + timedelta(days=30),
+               company_name(rng.randrange(names)), sign * tebetalen, sign * basisbedrag, f"Factuur {i + 1}",
+               f"F{i + 1:06d}"]
+
+
+def erelonen_rows(rows, names, rng):
+    # Title, blank row and an empty header row, the export is read with skiprows=2
+    yield ["Erelonen export"]
+    yield []
+    yield [None] * 9
+    for i in range(rows):
+        tebetalen, basisbedrag = TOTALS[i % len(TOTALS)]
+        datum = datetime(BENCHMARK_YEAR, BENCHMARK_MONTH, 1 + i % 28)
+        yield [building_name(rng.randrange(names)), f"AF{1 + i % 2}/AF{i + 1:06d}", tebetalen, basisbedrag,
+               tebetalen - basisbedrag, datum + timedelta(days=30), 0, i + 1, datum]
+
+
+def rappels_rows(rows, names, rng):
+    yield ["Gebouw", "Relatiecode", "Factuurnr", "Totaal brutto", "Totaal netto", "Totaal BTW", "Doc nr",
+           "Documentdatum"]
+    for i in range(rows):
+        name = rng.randrange(names)
+        yield [building_name(name), relatiecode(name), f"RAPP{i + 1:06d}", 15.0, 15.0, 0.0, i + 1,
+               datetime(BENCHMARK_YEAR, BENCHMARK_MONTH, 1 + i % 28)]
+
+
+LAYOUTS = {"billit": billit_rows, "erelonen": erelonen_rows, "rappels": rappels_rows}
+
+
+def generate_workbook(path, conversion_type, rows, seed=0):
+    """Writes a synthetic input workbook with an openpyxl write-only workbook."""
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for row in LAYOUTS[conversion_type](rows, distinct_names(rows), rng):
+        sheet.append(row)
+    workbook.save(path)
+
+
+def prepare_work_dir(work_dir, conversion_type, rows, regenerate=False):
+    """Creates the workbook and reference files of one benchmark case and returns the workbook path."""
+    case_dir = os.path.join(work_dir, f"{conversion_type}_{rows}")
+    os.makedirs(case_dir, exist_ok=True)
+    input_path = os.path.join(case_dir, f"{conversion_type}_{rows}.xlsx")
+    if regenerate or not os.path.exists(input_path):
+        generate_workbook(input_path, conversion_type, rows)
+    # Reference files are rewritten every run, conversions may append to them
+    write_relatiecodes(os.path.join(case_dir, converter.RELATIECODES_FILE), distinct_names(rows))
+    write_grootboekrekeningen(os.path.join(case_dir, converter.GROOTBOEKREKENINGEN_FILE))
+    name_cache = os.path.join(case_dir, converter.NORMALIZED_NAMES_FILE)
+    if os.path.exists(name_cache):
+        os.remove(name_cache)
+    return case_dir, input_path
+
+
+def run_case(conversion_type, rows, work_dir, regenerate=False):
+    case_dir, input_path = prepare_work_dir(work_dir, conversion_type, rows, regenerate)
+
+    cwd = os.getcwd()
+    os.chdir(case_dir)
+    try:
+        # Point the cached reference files and the name cache at the synthetic files of this case
+        converter.RELATIECODES.invalidate()
+        converter.GROOTBOEKREKENINGEN.invalidate()
+        converter.NAME_CACHE.invalidate()
+
+        start = time.perf_counter()
+        saved_path = converter.run_conversion(CONVERSION_TYPES[conversion_type], input_path,
+                                              os.path.join(case_dir, "output"), BENCHMARK_MONTH, BENCHMARK_YEAR)
+        total = time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+
+    # The stage times and rows are the ones the conversion recorded itself
+    stages = converter.METRICS.stages.values()
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "type": conversion_type,
+        "rows": rows,
+        "engine": readers.excel_engine(),
+        "ok": saved_path is not None,
+        "total": round(total, 4),
+        "stages": {stage.stage: round(stage.seconds, 4) for stage in stages},
+        "stage_rows": {stage.stage: stage.rows for stage in stages},
+        "peak_memory": converter.METRICS.peak_memory,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def record_results(results, results_file):
+    with open(results_file, "a", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+
+
+def print_results(results):
+    stages = converter.STAGES
+    print(f"{'type':<10}{'rows':>10}{'total':>10}" + "".join(f"{stage:>13}" for stage in stages))
+    for result in results:
+        print(f"{result['type']:<10}{result['rows']:>10}{result['total']:>10.3f}" +
+              "".join(f"{result['stages'].get(stage, 0.0):>13.3f}" for stage in stages))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the conversions on synthetic workbooks.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="Rows per workbook")
+    parser.add_argument("--types", nargs="+", choices=sorted(CONVERSION_TYPES), default=sorted(CONVERSION_TYPES))
+    parser.add_argument("--engine", choices=["calamine", "openpyxl"], help="Excel reader engine")
+    parser.add_argument("--work-dir", default=WORK_DIR, help="Folder for the generated workbooks")
+    parser.add_argument("--results", default=RESULTS_FILE, help="JSON lines file the results are appended to")
+    parser.add_argument("--regenerate", action="store_true", help="Generate the workbooks again")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    readers.set_engine(args.engine)
+    converter.set_code_prompt(converter.MissingCodePolicy("skip"))
+    converter.set_log_handler(lambda line: None)
+
+    results = [run_case(conversion_type, rows, os.path.abspath(args.work_dir), args.regenerate)
+               for conversion_type in args.types for rows in args.sizes]
+
+    record_results(results, args.results)
+    print_results(results)
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
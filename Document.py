@@ -1,84 +1,144 @@
-class Document:
-    def __init__(self, boekjaar, dagboek, nummer, datum, relatiecode, vervaldatum, tebetalen, basisbedrag, omschrijving, rekening=700002):
-        self.boekjaar = boekjaar
-        self.dagboek = dagboek
-        self.nummer = nummer
-        self.periode = datum.strftime("%m")
-        self.btwregime = "H"
-        self.datum = datum.strftime("%d/%m/%Y")
-        self.relatiecode = relatiecode
-        self.vervaldatum = vervaldatum.strftime("%d/%m/%Y")
-        self.tebetalen = tebetalen
-        self.basisbedrag = basisbedrag
-        self.btwtebetalen = tebetalen - basisbedrag
-        self.btwcode = self.get_btw_code()
-        self.valutacode = "EUR"
-        self.omschrijving = omschrijving  # Placeholder
-        self.koers = ""  # Placeholder
-        self.vertegenw_code = ""  # Placeholder
-        self.statusfact_status = "OK"  # Placeholder
-        self.codefcbd_codefcbd = "F"
-        self.kortcont = ""  # Placeholder
-        self.bedragkc = ""  # Placeholder
-        self.betvoorw_code = ""  # Placeholder
-        self.ogm = ""  # Placeholder
-        self.kredbep = ""  # Placeholder
-        self.driehoeksverkeer = ""  # Placeholder
-        self.boekhpl_reknr = rekening  # Placeholder
-        self.omschr_d = ""  # Placeholder
-        self.datum_d = self.datum  # Placeholder
-        self.bedrag_d = self.basisbedrag  # Placeholder
-        self.btwcodes_btwcode_d = self.btwcode  # Placeholder
-        self.code_a = ""  # Placeholder
-        self.bedrag_a = ""  # Placeholder
-
-    def get_btw_code(self):
-        if self.basisbedrag == 0:
-            return 0
-        else:
-            ratio = round(self.tebetalen / self.basisbedrag, 2)
-            if ratio == 1.00:
-                return 5
-            elif ratio == 1.06:
-                return 2
-            elif ratio == 1.12:
-                return 3
-            elif ratio == 1.21:
-                return 4
-            else:
-                return "FOUT"
-
-    def to_dict(self):
-        return {
-            'boekjaar_boekjaar (H)': self.boekjaar,
-            'dagboek_dagboek (H)': self.dagboek,
-            'factuur (H)': self.nummer,
-            'periode_periode (H)': self.periode,
-            'btwregimes_btwregime (H)': self.btwregime,
-            'factdat (H)': self.datum,
-            'relaties_code (H)': self.relatiecode,
-            'vervdat (H)': self.vervaldatum,
-            'omschrijving (H)': self.omschrijving,
-            'valuta_code (H)': self.valutacode,
-            'koers (H)': self.koers,
-            'vertegenw_code (H)': self.vertegenw_code,
-            'tebet (H)': self.tebetalen,
-            'statusfact_status (H)': self.statusfact_status,
-            'codefcbd_codefcbd (H)': self.codefcbd_codefcbd,
-            'kortcont (H)': self.kortcont,
-            'bedragkc (H)': self.bedragkc,
-            'basis (H)': self.basisbedrag,
-            'btwtebet (H)': self.btwtebetalen,
-            'betvoorw_code (H)': self.betvoorw_code,
-            'ogm (H)': self.ogm,
-            'kredbep (H)': self.kredbep,
-            'driehoeksverkeer (H)': self.driehoeksverkeer,
-            'boekhpl_reknr (D)': self.boekhpl_reknr,
-            'omschr (D)': self.omschr_d,
-            'datum (D)': self.datum_d,
-            'bedrag (D)': self.bedrag_d,
-            'btwcodes_btwcode (D)': self.btwcodes_btwcode_d,
-            'code (A)': self.code_a,
-            'bedrag (A)': self.bedrag_a,
-        }
+import numpy as np
+import pandas as pd
 
+DOCUMENT_COLUMNS = [
+    'boekjaar_boekjaar (H)', 'dagboek_dagboek (H)', 'factuur (H)', 'periode_periode (H)',
+    'btwregimes_btwregime (H)', 'factdat (H)', 'relaties_code (H)', 'vervdat (H)', 'omschrijving (H)',
+    'valuta_code (H)', 'koers (H)', 'vertegenw_code (H)', 'tebet (H)', 'statusfact_status (H)',
+    'codefcbd_codefcbd (H)', 'kortcont (H)', 'bedragkc (H)', 'basis (H)', 'btwtebet (H)', 'betvoorw_code (H)',
+    'ogm (H)', 'kredbep (H)', 'driehoeksverkeer (H)', 'boekhpl_reknr (D)', 'omschr (D)', 'datum (D)',
+    'bedrag (D)', 'btwcodes_btwcode (D)', 'code (A)', 'bedrag (A)'
+]
+
+# BTW rate -> btwcode. A document gets the code of the rate for which tebetalen / basis is closest to 1 + rate,
+# if it is within BTW_TOLERANCE; a basis of 0 gets code 0.
+BTW_RATES = {0.00: 5, 0.06: 2, 0.12: 3, 0.21: 4}
+BTW_TOLERANCE = 0.005
+# Columns btw_exception_details adds to the rows of the BTW exception report
+BTW_DETAIL_COLUMNS = ['BTW ratio', 'Nearest rate', 'BTW difference', 'Mixed rate split']
+
+
+DOCUMENT_CONSTANTS = {
+    'btwregimes_btwregime (H)': "H",
+    'valuta_code (H)': "EUR",
+    'koers (H)': "",
+    'vertegenw_code (H)': "",
+    'statusfact_status (H)': "OK",
+    'kortcont (H)': "",
+    'bedragkc (H)': "",
+    'betvoorw_code (H)': "",
+    'ogm (H)': "",
+    'kredbep (H)': "",
+    'driehoeksverkeer (H)': "",
+    'omschr (D)': "",
+    'code (A)': "",
+    'bedrag (A)': "",
+}
+
+
+def set_btw_rates(rates, tolerance=None):
+    """Replaces the rate table (rate -> btwcode, e.g. {0.21: 4}) and optionally the tolerance."""
+    global BTW_RATES, BTW_TOLERANCE
+    BTW_RATES = dict(rates)
+    if tolerance is not None:
+        BTW_TOLERANCE = tolerance
+
+
+def classify_btw(tebetalen, basisbedrag, rates=None, tolerance=None):
+    """
+    Classifies whole amount Series in one pass against the rate table.
+    Returns a DataFrame with the 'btwcode' (None when no rate matches), the 'ratio' tebetalen / basis and whether
+    the row 'matched' a rate.
+    """
+    rates = BTW_RATES if rates is None else rates
+    tolerance = BTW_TOLERANCE if tolerance is None else tolerance
+    tebet = pd.to_numeric(tebetalen, errors='coerce').to_numpy(dtype=float)
+    basis = pd.to_numeric(basisbedrag, errors='coerce').to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = tebet / basis
+
+    # Distance of every ratio to every 1 + rate, the closest rate wins
+    factors = 1 + np.fromiter(rates.keys(), dtype=float, count=len(rates))
+    codes = np.array(list(rates.values()), dtype=object)
+    distance = np.abs(ratio[:, None] - factors[None, :])
+    nearest = np.argmin(np.nan_to_num(distance, nan=np.inf), axis=1)
+    matched = distance[np.arange(len(ratio)), nearest] <= tolerance + 1e-9
+
+    zero = basis == 0
+    btwcode = np.where(matched, codes[nearest], None)
+    btwcode[zero] = 0
+    return pd.DataFrame({'btwcode': btwcode, 'ratio': ratio, 'matched': matched | zero}, index=tebetalen.index)
+
+
+def btw_exception_details(tebetalen, basisbedrag, rates=None):
+    """
+    Explains rows that match no rate: the ratio, the nearest rate and the BTW difference with it.
+    A ratio between two rates can be a mixed-rate invoice, for those the split of the basis over the two
+    neighbouring rates that gives exactly this BTW is proposed.
+    """
+    rates = sorted(BTW_RATES if rates is None else rates)
+    tebet = pd.to_numeric(tebetalen, errors='coerce')
+    basis = pd.to_numeric(basisbedrag, errors='coerce')
+    ratio = tebet / basis
+    btw = tebet - basis
+
+    factors = pd.Series(rates) + 1
+    nearest = ratio.map(lambda value: rates[int((factors - value).abs().idxmin())] if pd.notna(value) else None)
+
+    lower = ratio.map(lambda value: max((rate for rate in rates if 1 + rate < value), default=None))
+    upper = ratio.map(lambda value: min((rate for rate in rates if 1 + rate > value), default=None))
+    mixed = lower.notna() & upper.notna()
+    upper_basis = (btw - basis * lower.astype(float)) / (upper.astype(float) - lower.astype(float))
+    split = pd.Series("", index=ratio.index, dtype=object)
+    split[mixed] = (
+        (lower[mixed].astype(float) * 100).round(0).astype(int).astype(str) + "%: "
+        + (basis[mixed] - upper_basis[mixed]).round(2).astype(str) + " + "
+        + (upper[mixed].astype(float) * 100).round(0).astype(int).astype(str) + "%: "
+        + upper_basis[mixed].round(2).astype(str)
+    )
+
+    return pd.DataFrame({
+        'BTW ratio': ratio.round(4),
+        'Nearest rate': nearest,
+        'BTW difference': (btw - basis * nearest.astype(float)).round(2),
+        'Mixed rate split': split,
+    }, index=tebetalen.index)
+
+
+def get_btw_codes(tebetalen, basisbedrag):
+    """Returns the btwcode for whole amount Series, "FOUT" where the ratio matches no rate."""
+    btwcodes = classify_btw(tebetalen, basisbedrag)['btwcode']
+    return btwcodes.where(btwcodes.notna(), "FOUT").astype(object)
+
+
+def build_document_frame(boekjaar, dagboek, nummer, datum, relatiecode, vervaldatum, tebetalen, basisbedrag,
+                         omschrijving, rekening=700002, codefcbd="F", btwcode=None):
+    """
+    Builds the converted documents in the DOCUMENT_COLUMNS layout for a whole batch at once.
+    All arguments are Series on the same index (or scalars); datum and vervaldatum must be datetime Series.
+    Without btwcode, the BTW codes are derived from the amounts.
+    """
+    index = datum.index
+    datum_str = datum.dt.strftime("%d/%m/%Y")
+    if btwcode is None:
+        btwcode = get_btw_codes(tebetalen, basisbedrag)
+    columns = {
+        'boekjaar_boekjaar (H)': boekjaar,
+        'dagboek_dagboek (H)': dagboek,
+        'factuur (H)': nummer,
+        'periode_periode (H)': datum.dt.strftime("%m"),
+        'factdat (H)': datum_str,
+        'relaties_code (H)': relatiecode,
+        'vervdat (H)': vervaldatum.dt.strftime("%d/%m/%Y"),
+        'omschrijving (H)': omschrijving,
+        'tebet (H)': tebetalen,
+        'codefcbd_codefcbd (H)': codefcbd,
+        'basis (H)': basisbedrag,
+        'btwtebet (H)': tebetalen - basisbedrag,
+        'boekhpl_reknr (D)': rekening,
+        'datum (D)': datum_str,
+        'bedrag (D)': basisbedrag,
+        'btwcodes_btwcode (D)': btwcode,
+        **DOCUMENT_CONSTANTS,
+    }
+    return pd.DataFrame(columns, index=index)[DOCUMENT_COLUMNS].reset_index(drop=True)
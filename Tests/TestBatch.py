@@ -0,0 +1,28 @@
+import os
+import unittest
+
+from batch import make_jobs, output_subfolders
+
+
+class TestOutputSubfolders(unittest.TestCase):
+
+    def test_names_are_the_file_names_without_extension(self):
+        self.assertEqual(output_subfolders([os.path.join("a", "billit.xlsx"), "erelonen.xls"]), ["billit", "erelonen"])
+
+    def test_the_same_name_in_other_folders_gets_a_number(self):
+        paths = [os.path.join("a", "export.xlsx"), os.path.join("b", "export.xlsx"), os.path.join("c", "Export.xls")]
+        self.assertEqual(output_subfolders(paths), ["export", "export_2", "Export_3"])
+
+    def test_numbered_names_do_not_take_an_existing_name(self):
+        paths = ["export_2.xlsx", os.path.join("a", "export.xlsx"), os.path.join("b", "export.xlsx")]
+        self.assertEqual(output_subfolders(paths), ["export_2", "export", "export_3"])
+
+    def test_jobs_get_a_folder_each(self):
+        jobs = make_jobs([("Billit", os.path.join("a", "export.xlsx")), ("Billit", os.path.join("b", "export.xlsx"))],
+                         "out")
+        self.assertEqual([job.output_folder_path for job in jobs],
+                         [os.path.join("out", "export"), os.path.join("out", "export_2")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import converter
+import Document
+
+from Document import BTW_DETAIL_COLUMNS, btw_exception_details, classify_btw, get_btw_codes
+
+RATES = {0.00: 5, 0.06: 2, 0.12: 3, 0.21: 4}
+
+
+def amounts(*values):
+    return pd.Series(values, dtype=float)
+
+
+class TestClassifyBtw(unittest.TestCase):
+
+    def classify(self, tebetalen, basisbedrag):
+        return classify_btw(amounts(*tebetalen), amounts(*basisbedrag), RATES, 0.005)
+
+    def test_exact_rates(self):
+        result = self.classify([100.0, 106.0, 112.0, 121.0], [100.0] * 4)
+        self.assertEqual(result['btwcode'].tolist(), [5, 2, 3, 4])
+        self.assertTrue(result['matched'].all())
+
+    def test_tolerance_edges_are_included(self):
+        result = self.classify([105.5, 106.5], [100.0, 100.0])
+        self.assertEqual(result['btwcode'].tolist(), [2, 2])
+        self.assertTrue(result['matched'].all())
+
+    def test_just_outside_the_tolerance_matches_no_rate(self):
+        result = self.classify([105.4, 106.6], [100.0, 100.0])
+        self.assertEqual(result['btwcode'].tolist(), [None, None])
+        self.assertFalse(result['matched'].any())
+
+    def test_credit_notes_have_the_rate_of_their_ratio(self):
+        result = self.classify([-121.0], [-100.0])
+        self.assertEqual(result['btwcode'].tolist(), [4])
+
+    def test_basis_zero_gets_code_zero(self):
+        result = self.classify([0.0, 50.0], [0.0, 0.0])
+        self.assertEqual(result['btwcode'].tolist(), [0, 0])
+        self.assertTrue(result['matched'].all())
+
+    def test_missing_amounts_match_no_rate(self):
+        result = self.classify([np.nan, 121.0], [100.0, np.nan])
+        self.assertEqual(result['btwcode'].tolist(), [None, None])
+        self.assertFalse(result['matched'].any())
+
+    def test_keeps_the_index(self):
+        result = classify_btw(pd.Series([121.0], index=[7]), pd.Series([100.0], index=[7]), RATES)
+        self.assertEqual(result.index.tolist(), [7])
+
+    def test_get_btw_codes_marks_unmatched_rows(self):
+        self.assertEqual(get_btw_codes(amounts(121.0, 130.0), amounts(100.0, 100.0)).tolist(), [4, "FOUT"])
+
+
+class TestBtwExceptionDetails(unittest.TestCase):
+
+    def test_columns(self):
+        details = btw_exception_details(amounts(130.0), amounts(100.0), RATES)
+        self.assertEqual(list(details.columns), BTW_DETAIL_COLUMNS)
+
+    def test_ratio_between_two_rates_is_split_over_them(self):
+        details = btw_exception_details(amounts(115.0), amounts(100.0), RATES).iloc[0]
+        self.assertEqual(details['BTW ratio'], 1.15)
+        self.assertEqual(details['Nearest rate'], 0.12)
+        self.assertEqual(details['BTW difference'], 3.0)
+        self.assertEqual(details['Mixed rate split'], "12%: 66.67 + 21%: 33.33")
+
+    def test_split_gives_the_btw_of_the_invoice(self):
+        details = btw_exception_details(amounts(109.0), amounts(100.0), RATES).iloc[0]
+        self.assertEqual(details['Mixed rate split'], "6%: 50.0 + 12%: 50.0")
+
+    def test_ratio_above_the_highest_rate_has_no_split(self):
+        details = btw_exception_details(amounts(130.0), amounts(100.0), RATES).iloc[0]
+        self.assertEqual(details['Nearest rate'], 0.21)
+        self.assertEqual(details['BTW difference'], 9.0)
+        self.assertEqual(details['Mixed rate split'], "")
+
+    def test_ratio_below_zero_rate_has_no_split(self):
+        details = btw_exception_details(amounts(95.0), amounts(100.0), RATES).iloc[0]
+        self.assertEqual(details['Nearest rate'], 0.0)
+        self.assertEqual(details['BTW difference'], -5.0)
+        self.assertEqual(details['Mixed rate split'], "")
+
+    def test_missing_amounts_have_no_nearest_rate(self):
+        details = btw_exception_details(amounts(np.nan), amounts(100.0), RATES).iloc[0]
+        self.assertIsNone(details['Nearest rate'])
+        self.assertTrue(np.isnan(details['BTW difference']))
+        self.assertEqual(details['Mixed rate split'], "")
+
+
+class TestLoadBtwRates(unittest.TestCase):
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.lines = []
+        self.addCleanup(Document.set_btw_rates, Document.BTW_RATES)
+        self.addCleanup(setattr, converter, "BTW_RATES_FILE", converter.BTW_RATES_FILE)
+        self.addCleanup(converter.set_log_handler, converter.LOG_HANDLER)
+        converter.BTW_RATES_FILE = os.path.join(self.folder, "btw_rates.csv")
+        converter.set_log_handler(self.lines.append)
+        Document.set_btw_rates(RATES)
+
+    def write(self, text):
+        with open(converter.BTW_RATES_FILE, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_reads_the_rates_in_percent(self):
+        self.write("Rate;Code\n0;5\n6;2\n9,5;7\n21;4\n")
+        converter.load_btw_rates()
+        self.assertEqual(Document.BTW_RATES, {0.0: 5, 0.06: 2, 0.095: 7, 0.21: 4})
+
+    def test_without_a_file_the_rates_stay(self):
+        converter.load_btw_rates()
+        self.assertEqual(Document.BTW_RATES, RATES)
+
+    def test_invalid_tables_raise_and_keep_the_rates(self):
+        for text in ["Percentage;Code\n21;4\n", "Rate;Code\n21;4\nhoog;3\n", "Rate;Code\n21;\n",
+                     "Rate;Code\n21;4\n21;3\n"]:
+            with self.subTest(text=text):
+                self.write(text)
+                with self.assertRaises(converter.ConfigurationError):
+                    converter.load_btw_rates()
+                self.assertEqual(Document.BTW_RATES, RATES)
+
+    def test_the_error_names_the_rows(self):
+        self.write("Rate;Code\n21;4\nhoog;3\n")
+        with self.assertRaisesRegex(converter.ConfigurationError, r"not a number in row\(s\) \[3\]"):
+            converter.load_btw_rates()
+
+    def test_conversion_logs_the_error_and_finishes_its_metrics(self):
+        self.write("Percentage;Code\n21;4\n")
+        saved_path = converter.run_conversion("Billit", os.path.join(self.folder, "billit.xlsx"), self.folder)
+        self.assertIsNone(saved_path)
+        self.assertFalse(converter.conversion_ok())
+        self.assertTrue(any("Configuration error:" in line for line in self.lines))
+        self.assertTrue(os.path.exists(os.path.join(self.folder, "conversion_metrics.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from cleancsv import conflicts_path, merge_reference_files
+
+
+class TestMergeReferenceFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def write(self, name, text, encoding="utf-8"):
+        path = os.path.join(self.folder.name, name)
+        with open(path, "w", encoding=encoding) as f:
+            f.write("Name;Relatiecode\n" + text)
+        return path
+
+    def read(self, path):
+        return pd.read_csv(path, delimiter=";", dtype=str, keep_default_na=False)
+
+    def merge(self, *paths, chunksize=2):
+        output = os.path.join(self.folder.name, "merged.csv")
+        return merge_reference_files(paths, output, chunksize), output
+
+    def test_keeps_the_first_spelling_of_a_name(self):
+        path = self.write("a.csv", "Résidence Été;L001\nResidence Ete;L001\n")
+        result, output = self.merge(path)
+        self.assertEqual(self.read(output).values.tolist(), [["Résidence Été", "L001"]])
+        self.assertEqual((result.written, result.duplicates, result.conflicts), (1, 1, 0))
+
+    def test_first_code_wins_and_other_codes_are_reported(self):
+        first = self.write("a.csv", "Bedrijf A;H001\n")
+        second = self.write("b.csv", "Bedrijf Ä;H009\nBedrijf B;H002\n")
+        result, output = self.merge(first, second)
+        self.assertEqual(self.read(output).values.tolist(), [["Bedrijf A", "H001"], ["Bedrijf B", "H002"]])
+        conflicts = self.read(conflicts_path(output))
+        self.assertEqual(conflicts.values.tolist(), [["b.csv", "2", "Bedrijf Ä", "H009", "H001"]])
+        self.assertEqual((result.written, result.duplicates, result.conflicts), (2, 0, 1))
+
+    def test_skips_names_without_a_code(self):
+        path = self.write("a.csv", "Bedrijf A;H001\nBedrijf B;\nBedrijf B;H002\nBedrijf Ä;H001\n")
+        result, output = self.merge(path)
+        self.assertEqual(self.read(output).values.tolist(), [["Bedrijf A", "H001"], ["Bedrijf B", "H002"]])
+        self.assertFalse(os.path.exists(conflicts_path(output)))
+        self.assertEqual((result.rows, result.written, result.duplicates, result.conflicts, result.without_code),
+                         (4, 2, 1, 0, 1))
+
+    def test_counts_rows_without_a_name(self):
+        path = self.write("a.csv", "Bedrijf A;H001\n;H002\n ;\n;\nBedrijf B;\n")
+        result, output = self.merge(path)
+        self.assertEqual(self.read(output).values.tolist(), [["Bedrijf A", "H001"]])
+        self.assertEqual((result.rows, result.written, result.without_code, result.without_name), (5, 1, 1, 3))
+        self.assertEqual(result.rows, result.written + result.duplicates + result.conflicts + result.without_code
+                         + result.without_name)
+        self.assertIn("skipped 3 rows without a name", result.summary())
+
+    def test_reads_cp1252_files(self):
+        path = self.write("a.csv", "Café Noord;H001\n", encoding="cp1252")
+        _, output = self.merge(path)
+        self.assertEqual(self.read(output).values.tolist(), [["Café Noord", "H001"]])
+
+    def test_refuses_an_input_as_output(self):
+        path = self.write("a.csv", "Bedrijf A;H001\n")
+        with self.assertRaises(ValueError):
+            merge_reference_files([path], path)
+        self.assertEqual(self.read(path).values.tolist(), [["Bedrijf A", "H001"]])
+
+    def test_refuses_files_without_the_reference_columns(self):
+        path = os.path.join(self.folder.name, "a.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("Naam;Code\nBedrijf A;H001\n")
+        with self.assertRaises(ValueError):
+            self.merge(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
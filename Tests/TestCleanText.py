@@ -0,0 +1,88 @@
+import unittest
+
+import numpy as np
+
+from textrepair import MAX_CHARACTER_EXPANSION, clean_text, lost_character_pattern, repair_text
+
+
+class TestRepairText(unittest.TestCase):
+
+    def test_repairs_utf8_read_as_cp1252(self):
+        self.assertEqual(repair_text("IMMOBILIÃ‹N"), "IMMOBILIËN")
+        self.assertEqual(repair_text("CafÃ© â€“ Bar"), "Café – Bar")
+
+    def test_repairs_text_that_was_damaged_twice(self):
+        self.assertEqual(repair_text("IMMOBILIÃƒâ€¹N"), "IMMOBILIËN")
+
+    def test_keeps_correct_text(self):
+        self.assertEqual(repair_text("IMMOBILIËN"), "IMMOBILIËN")
+        self.assertEqual(repair_text("Bedrijf A"), "Bedrijf A")
+
+    def test_keeps_a_marker_that_is_no_mojibake(self):
+        self.assertEqual(repair_text("Ã"), "Ã")
+
+    def test_keeps_other_values(self):
+        self.assertIsNone(repair_text(None))
+        self.assertEqual(repair_text(5), 5)
+
+
+class TestCleanText(unittest.TestCase):
+
+    def test_removes_accents(self):
+        self.assertEqual(clean_text("Café Ëlise"), "Cafe Elise")
+
+    def test_strips_whitespace_and_replaces_dashes(self):
+        self.assertEqual(clean_text("  Gebouw – Noord "), "Gebouw - Noord")
+
+    def test_repairs_mojibake_before_removing_accents(self):
+        self.assertEqual(clean_text("IMMOBILIÃ‹N"), "IMMOBILIEN")
+        self.assertEqual(clean_text("IMMOBILIÃƒâ€¹N"), "IMMOBILIEN")
+
+    def test_keeps_replacement_characters(self):
+        self.assertEqual(clean_text("Co�me"), "Co�me")
+        self.assertEqual(clean_text("Bé�ier"), "Be�ier")
+
+    def test_spellings_of_one_name_get_the_same_key(self):
+        self.assertEqual(clean_text("IMMOBILIËN"), clean_text(" IMMOBILIÃ‹N"))
+
+    def test_keeps_other_values(self):
+        self.assertIsNone(clean_text(None))
+        self.assertTrue(np.isnan(clean_text(np.nan)))
+        self.assertEqual(clean_text(12), 12)
+
+
+class TestLostCharacterPattern(unittest.TestCase):
+
+    def test_replacement_character_stands_for_one_character(self):
+        pattern = lost_character_pattern("Co�me")
+        self.assertTrue(pattern.fullmatch("Cosme"))
+        self.assertTrue(pattern.fullmatch("Coéme"))
+        self.assertFalse(pattern.fullmatch("Come"))
+        self.assertFalse(pattern.fullmatch("Cossme"))
+        self.assertFalse(pattern.fullmatch("Co me"))
+
+    def test_expansion_matches_normalized_names(self):
+        pattern = lost_character_pattern("Stra�e", MAX_CHARACTER_EXPANSION)
+        self.assertTrue(pattern.fullmatch(clean_text("Straße")))
+        self.assertTrue(pattern.fullmatch("Strabe"))
+        self.assertFalse(pattern.fullmatch("Strasese"))
+        self.assertFalse(lost_character_pattern("Stra�e").fullmatch("Strasse"))
+
+    def test_every_replacement_character_is_matched(self):
+        pattern = lost_character_pattern("�ko�e")
+        self.assertTrue(pattern.fullmatch("Ekobe"))
+        self.assertFalse(pattern.fullmatch("Ekoe"))
+
+    def test_other_characters_match_literally(self):
+        pattern = lost_character_pattern("A.B (�)")
+        self.assertTrue(pattern.fullmatch("A.B (x)"))
+        self.assertFalse(pattern.fullmatch("AxB (x)"))
+
+    def test_text_without_replacement_characters_matches_itself(self):
+        pattern = lost_character_pattern("Bedrijf A")
+        self.assertTrue(pattern.fullmatch("Bedrijf A"))
+        self.assertFalse(pattern.fullmatch("Bedrijf B"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+from converter import parse_code_paste
+
+NAMES = ['Bedrijf X', 'Bedrijf Y', 'Bedrijf Z']
+
+
+class TestParseCodePaste(unittest.TestCase):
+
+    def test_pairs_are_matched_by_name(self):
+        codes, unmatched = parse_code_paste("Bedrijf Z\tH3\nBedrijf X;H1\n", NAMES)
+        self.assertEqual(codes, {'Bedrijf Z': 'H3', 'Bedrijf X': 'H1'})
+        self.assertEqual(unmatched, [])
+
+    def test_names_are_matched_without_case_whitespace_and_accents(self):
+        codes, unmatched = parse_code_paste("Bedrijf X\tH1\n bedrijf y \tH2\nBEDRIJF Ž\tH3\n", NAMES)
+        self.assertEqual(codes, {'Bedrijf X': 'H1', 'Bedrijf Y': 'H2', 'Bedrijf Z': 'H3'})
+        self.assertEqual(unmatched, [])
+
+    def test_unknown_names_are_returned_not_assigned(self):
+        codes, unmatched = parse_code_paste("Bedrijf X\tH1\nBedrijf Q\tH2\n", NAMES)
+        self.assertEqual(codes, {'Bedrijf X': 'H1'})
+        self.assertEqual(unmatched, ["Bedrijf Q\tH2"])
+
+    def test_header_rows_are_returned_not_assigned(self):
+        codes, unmatched = parse_code_paste("Name;Relatiecode\nBedrijf Y;H2\n", NAMES)
+        self.assertEqual(codes, {'Bedrijf Y': 'H2'})
+        self.assertEqual(unmatched, ["Name;Relatiecode"])
+        codes, unmatched = parse_code_paste("Relatiecode\nH1\nH2\n", NAMES)
+        self.assertEqual(codes, {'Bedrijf X': 'H1', 'Bedrijf Y': 'H2'})
+        self.assertEqual(unmatched, ["Relatiecode"])
+
+    def test_single_codes_fill_the_names_in_order_from_start(self):
+        codes, unmatched = parse_code_paste("H2\n\nH3\nH4\n", NAMES, start=1)
+        self.assertEqual(codes, {'Bedrijf Y': 'H2', 'Bedrijf Z': 'H3'})
+        self.assertEqual(unmatched, ["H4"])
+
+    def test_mixed_one_and_two_column_lines(self):
+        codes, unmatched = parse_code_paste("Bedrijf Z\tH3\nH1\n\tH2\nbedrijf q\tH9\n", NAMES)
+        self.assertEqual(codes, {'Bedrijf Z': 'H3', 'Bedrijf X': 'H1', 'Bedrijf Y': 'H2'})
+        self.assertEqual(unmatched, ["bedrijf q\tH9"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+import converter
+
+from Document import DOCUMENT_COLUMNS
+
+
+def old_btw_code(tebetalen, basisbedrag):
+    """The BTW code of the per-row Document, from exact ratios."""
+    if basisbedrag == 0:
+        return 0
+    return {1.00: 5, 1.06: 2, 1.12: 3, 1.21: 4}.get(round(tebetalen / basisbedrag, 2), "FOUT")
+
+
+def old_document_row(boekjaar, dagboek, nummer, datum, relatiecode, vervaldatum, tebetalen, basisbedrag,
+                     omschrijving, rekening=700002, codefcbd="F"):
+    """One converted row as the per-row Document built it before the column-wise builders."""
+    btwcode = old_btw_code(tebetalen, basisbedrag)
+    return {
+        'boekjaar_boekjaar (H)': boekjaar,
+        'dagboek_dagboek (H)': dagboek,
+        'factuur (H)': nummer,
+        'periode_periode (H)': datum.strftime("%m"),
+        'btwregimes_btwregime (H)': "H",
+        'factdat (H)': datum.strftime("%d/%m/%Y"),
+        'relaties_code (H)': relatiecode,
+        'vervdat (H)': vervaldatum.strftime("%d/%m/%Y"),
+        'omschrijving (H)': omschrijving,
+        'valuta_code (H)': "EUR",
+        'koers (H)': "",
+        'vertegenw_code (H)': "",
+        'tebet (H)': tebetalen,
+        'statusfact_status (H)': "OK",
+        'codefcbd_codefcbd (H)': codefcbd,
+        'kortcont (H)': "",
+        'bedragkc (H)': "",
+        'basis (H)': basisbedrag,
+        'btwtebet (H)': tebetalen - basisbedrag,
+        'betvoorw_code (H)': "",
+        'ogm (H)': "",
+        'kredbep (H)': "",
+        'driehoeksverkeer (H)': "",
+        'boekhpl_reknr (D)': rekening,
+        'omschr (D)': "",
+        'datum (D)': datum.strftime("%d/%m/%Y"),
+        'bedrag (D)': basisbedrag,
+        'btwcodes_btwcode (D)': btwcode,
+        'code (A)': "",
+        'bedrag (A)': "",
+    }
+
+
+def old_billit_rows(prepared_df):
+    rows = []
+    for _, row in prepared_df.iterrows():
+        order_nummer = str(row["Order nummer"])
+        dagboek, boekjaar, nummer = order_nummer.split("-") if "-" in order_nummer else [None, None, None]
+        factuurcode = "F"
+        if dagboek == "CN1":
+            dagboek = "CN"
+            factuurcode = "C"
+        rows.append(old_document_row(boekjaar, dagboek, nummer, pd.to_datetime(row["Datum"]), row["Relatiecode"],
+                                     pd.to_datetime(row["Vervaldag"]), abs(row["Totaal inclusief"]),
+                                     abs(row["Totaal exclusief"]), row["Betreft"], codefcbd=factuurcode))
+    return rows
+
+
+def old_erelonen_rows(df):
+    rekeningen = {"H": "700010", "D": "700020", "L": "700030", "G": "700040", "R": "700050"}
+    rows = []
+    for _, row in df.iterrows():
+        factuurnr = str(row["Factuurnr"])
+        if not factuurnr.startswith("AF"):
+            continue
+        dagboek, factuurnummer = factuurnr.split("/")
+        dagboek = {"AF1": "VK2", "AF2": "VK3"}.get(dagboek, dagboek)
+        datum = row["Documentdatum"]
+        rekening = rekeningen.get(row["Relatiecode"][0], "NA")
+        rows.append(old_document_row(datum.year, dagboek, factuurnummer[2:], datum, row["Relatiecode"],
+                                     pd.to_datetime(row["Vervaldag"]), abs(row["Totaal brutto"]),
+                                     abs(row["Totaal netto"]), "", rekening=rekening))
+    return rows
+
+
+def comparable(frame):
+    """The cells as written: missing values are empty and numbers are compared as text."""
+    frame = frame[DOCUMENT_COLUMNS].reset_index(drop=True).astype(object)
+    return frame.where(frame.notna(), "").astype(str)
+
+
+class TestDocumentFrames(unittest.TestCase):
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.addCleanup(converter.set_log_handler, converter.LOG_HANDLER)
+        converter.set_log_handler(lambda line: None)
+
+    def assertSameRows(self, frame, rows):
+        pd.testing.assert_frame_equal(comparable(frame), comparable(pd.DataFrame(rows)))
+
+    def test_billit_frame_matches_the_per_row_documents(self):
+        prepared_df = pd.DataFrame({
+            "Order nummer": ["VK1-2024-0001", "CN1-2024-0002", "VK1-2023-0153", "0004"],
+            "Datum": ["2024-03-01", "2024-03-02", "2023-12-31", "2024-03-04"],
+            "Vervaldag": ["2024-03-31", "2024-04-01", "2024-01-30", "2024-04-03"],
+            "Totaal inclusief": [121.0, -106.0, 112.0, 50.0],
+            "Totaal exclusief": [100.0, -100.0, 100.0, 0.0],
+            "Relatiecode": ["H001", "D002", "L003", "H004"],
+            "Betreft": ["Onderhoud", "Creditnota", "", "Zonder BTW"],
+            "Factuurnr": ["F1", "F2", "F3", "F4"],
+        })
+        frame, rejects = converter.create_frame_from_excel_Billit(prepared_df, self.folder)
+        self.assertTrue(rejects.empty)
+        self.assertSameRows(frame, old_billit_rows(prepared_df))
+
+    def test_erelonen_frame_matches_the_per_row_documents(self):
+        prepared_df = pd.DataFrame({
+            "Gebouw": ["A", "B", "C", "D", "E"],
+            "Factuurnr": ["AF1/240001", "AF2/240002", "VF1/240003", "AF1/240004", "AF1/240005"],
+            "Totaal brutto": [121.0, 106.0, 121.0, -112.0, 100.0],
+            "Totaal netto": [100.0, 100.0, 100.0, -100.0, 100.0],
+            "Totaal BTW": [21.0, 6.0, 21.0, -12.0, 0.0],
+            "Vervaldag": ["2024-04-01", "2024-04-02", "2024-04-03", "2024-04-04", "2024-04-05"],
+            "Betaald": [0, 0, 0, 0, 0],
+            "Documentnummer": [1, 2, 3, 4, 5],
+            "Documentdatum": pd.to_datetime(["2024-03-01", "2024-03-02", "2024-03-03", "2024-03-04",
+                                             "2024-03-05"]),
+            "Relatiecode": ["H001", "D002", "L003", "G004", "X005"],
+        })
+        frame, rejects = converter.create_frame_from_excel_Erelonen(prepared_df)
+        self.assertTrue(rejects.empty)
+        self.assertSameRows(frame, old_erelonen_rows(prepared_df))
+
+
+class TestSaveRejects(unittest.TestCase):
+
+    def test_helper_columns_are_not_written(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.addCleanup(converter.set_log_handler, converter.LOG_HANDLER)
+        converter.set_log_handler(lambda line: None)
+        df = pd.DataFrame({"Bedrijf": ["Bedrijf A", "Bedrijf B"], "cleaned_name": ["bedrijf a", "bedrijf b"]})
+        rejects = []
+        converter.reject_rows(rejects, df, pd.Series([False, True]), "Missing Relatiecode.")
+        converter.save_rejects(converter.concat_rejects(rejects), folder.name)
+        written = pd.read_csv(os.path.join(folder.name, "rejected_rows.csv"), sep=';')
+        self.assertEqual(list(written.columns), ["Row", "Error", "Bedrijf"])
+
+
+if __name__ == "__main__":
+    unittest.main()
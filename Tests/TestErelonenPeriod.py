@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+import converter
+
+from converter import erelonen_period_range
+from reference import ReferenceFile, read_grootboekrekeningen
+
+
+def month_index(year, month):
+    return year * 12 + month - 1
+
+
+class TestErelonenPeriodRange(unittest.TestCase):
+
+    def test_one_month_without_an_end(self):
+        self.assertEqual(erelonen_period_range(3, 2024), (month_index(2024, 3), month_index(2024, 3)))
+
+    def test_months_of_one_year(self):
+        self.assertEqual(erelonen_period_range(3, 2024, 6, 2024), (month_index(2024, 3), month_index(2024, 6)))
+
+    def test_range_over_the_end_of_the_year(self):
+        first, last = erelonen_period_range(11, 2023, 2, 2024)
+        self.assertEqual((first, last), (month_index(2023, 11), month_index(2024, 2)))
+        self.assertEqual(last - first + 1, 4)
+
+    def test_missing_end_year_is_the_start_year(self):
+        self.assertEqual(erelonen_period_range(3, 2024, end_month=5), (month_index(2024, 3), month_index(2024, 5)))
+
+    def test_missing_end_month_is_the_start_month(self):
+        self.assertEqual(erelonen_period_range(3, 2023, end_year=2024), (month_index(2023, 3), month_index(2024, 3)))
+
+    def test_end_before_the_start_is_the_start_month(self):
+        self.assertEqual(erelonen_period_range(6, 2024, 3, 2024), (month_index(2024, 6), month_index(2024, 6)))
+        self.assertEqual(erelonen_period_range(6, 2024, 12, 2023), (month_index(2024, 6), month_index(2024, 6)))
+
+    def test_month_index_orders_months_and_years(self):
+        self.assertEqual(erelonen_period_range(12, 2023)[0] + 1, erelonen_period_range(1, 2024)[0])
+
+
+class TestConvertErelonenPeriod(unittest.TestCase):
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.lines = []
+        self.addCleanup(setattr, converter, "GROOTBOEKREKENINGEN", converter.GROOTBOEKREKENINGEN)
+        self.addCleanup(converter.set_code_prompt, converter.CODE_PROMPT)
+        self.addCleanup(converter.set_code_review, converter.CODE_REVIEW)
+        self.addCleanup(converter.set_log_handler, converter.LOG_HANDLER)
+        self.addCleanup(converter.set_output_format, converter.OUTPUT_FORMAT)
+        converter.GROOTBOEKREKENINGEN = ReferenceFile(os.path.join(self.folder, "grootboekrekeningen.csv"),
+                                                      read_grootboekrekeningen)
+        converter.set_code_prompt(converter.MissingCodePolicy("skip"))
+        converter.set_code_review(None)
+        converter.set_log_handler(self.lines.append)
+        converter.set_output_format("csv")
+
+    def period(self, *relatiecodes):
+        count = len(relatiecodes)
+        return pd.DataFrame({
+            "Gebouw": ["Gebouw"] * count,
+            "Factuurnr": [f"AF1/24{i:04d}" for i in range(1, count + 1)],
+            "Totaal brutto": [121.0] * count,
+            "Totaal netto": [100.0] * count,
+            "Totaal BTW": [21.0] * count,
+            "Vervaldag": ["2024-04-01"] * count,
+            "Betaald": [0] * count,
+            "Documentnummer": list(range(count)),
+            "Documentdatum": ["2024-03-01"] * count,
+            "Relatiecode": list(relatiecodes),
+        }, index=range(10, 10 + count))
+
+    def test_rows_without_a_grootboekrekening_are_rejected_under_skip(self):
+        saved_path, rejects = converter.convert_erelonen_period(self.period("H001", "X001", "D002"), self.folder,
+                                                                False, 2024, 3)
+        self.assertEqual(rejects['Error'].tolist(), ["Missing Grootboekrekening."])
+        self.assertEqual(rejects['Row'].tolist(), [13])
+        self.assertEqual(rejects['Relatiecode'].tolist(), ["X001"])
+        written = pd.read_csv(saved_path, sep=';', dtype=str)
+        self.assertEqual(written['relaties_code (H)'].tolist(), ["H001", "D002"])
+        warning = "Warning: 1 rows of 03/2024 have no Grootboekrekening and are not converted, see rejected_rows.csv."
+        self.assertTrue(any(line.endswith(warning) for line in self.lines))
+
+    def test_nothing_is_saved_when_no_row_has_a_grootboekrekening(self):
+        saved_path, rejects = converter.convert_erelonen_period(self.period("X001"), self.folder, False, 2024, 3)
+        self.assertIsNone(saved_path)
+        self.assertEqual(len(rejects), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+import converter
+
+from Document import DOCUMENT_COLUMNS
+from ledger import ConversionLedger, read_ledger
+from reference import ReferenceFile
+
+
+def converted(*invoices):
+    """A converted frame with the key columns of the ledger, invoices are (nummer, amount)."""
+    return pd.DataFrame({
+        'dagboek_dagboek (H)': ["VK"] * len(invoices),
+        'boekjaar_boekjaar (H)': [2024] * len(invoices),
+        'factuur (H)': [nummer for nummer, _ in invoices],
+        'tebet (H)': [amount for _, amount in invoices],
+    })
+
+
+class TestConversionLedger(unittest.TestCase):
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.path = os.path.join(folder.name, "billit_ledger.csv")
+        self.ledger = ConversionLedger(ReferenceFile(self.path, read_ledger))
+
+    def new_or_changed(self, frame):
+        return self.ledger.new_or_changed(self.ledger.entries(frame)).tolist()
+
+    def test_everything_is_new_without_a_ledger_file(self):
+        self.assertEqual(self.new_or_changed(converted(("1", 121.0), ("2", 106.0))), [True, True])
+
+    def test_recorded_invoices_are_not_new(self):
+        frame = converted(("1", 121.0), ("2", 106.0))
+        self.ledger.record(self.ledger.entries(frame))
+        self.assertEqual(self.new_or_changed(frame), [False, False])
+        self.assertEqual(self.new_or_changed(converted(("1", 121.0), ("3", 112.0))), [False, True])
+
+    def test_changed_invoices_are_new(self):
+        self.ledger.record(self.ledger.entries(converted(("1", 121.0))))
+        self.assertEqual(self.new_or_changed(converted(("1", 242.0))), [True])
+
+    def test_the_last_export_of_an_invoice_counts(self):
+        self.ledger.record(self.ledger.entries(converted(("1", 121.0))))
+        self.ledger.record(self.ledger.entries(converted(("1", 242.0))))
+        self.assertEqual(self.new_or_changed(converted(("1", 242.0))), [False])
+        self.assertEqual(self.new_or_changed(converted(("1", 121.0))), [True])
+
+    def test_a_new_ledger_object_reads_the_file(self):
+        frame = converted(("1", 121.0))
+        self.ledger.record(self.ledger.entries(frame))
+        ledger = ConversionLedger(ReferenceFile(self.path, read_ledger))
+        self.assertEqual(ledger.new_or_changed(ledger.entries(frame)).tolist(), [False])
+
+    def test_rows_without_a_number_are_always_new_and_not_recorded(self):
+        frame = converted((None, 121.0))
+        self.ledger.record(self.ledger.entries(frame))
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(self.new_or_changed(frame), [True])
+
+    def test_missing_whole_numbers_are_no_key(self):
+        frame = converted(("1", 121.0), (None, 106.0))
+        frame['factuur (H)'] = pd.to_numeric(frame['factuur (H)']).astype('Int64')
+        self.ledger.record(self.ledger.entries(frame))
+        self.assertEqual(len(read_ledger(self.path)), 1)
+        self.assertEqual(self.new_or_changed(frame), [False, True])
+
+    def test_entries_keep_the_index(self):
+        frame = converted(("1", 121.0)).set_axis([5])
+        self.assertEqual(self.ledger.new_or_changed(self.ledger.entries(frame)).index.tolist(), [5])
+
+
+class TestSaveBillitOutput(unittest.TestCase):
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.path = os.path.join(self.folder, "billit_ledger.csv")
+        ledger, log_handler = converter.BILLIT_LEDGER, converter.LOG_HANDLER
+        self.addCleanup(setattr, converter, "BILLIT_LEDGER", ledger)
+        self.addCleanup(converter.set_log_handler, log_handler)
+        self.addCleanup(converter.set_output_format, converter.OUTPUT_FORMAT)
+        converter.BILLIT_LEDGER = ConversionLedger(ReferenceFile(self.path, read_ledger))
+        converter.set_log_handler(lambda line: None)
+        converter.set_output_format("csv")
+
+    def save(self, frame):
+        entries = converter.BILLIT_LEDGER.entries(frame)
+        return converter.save_billit_output(frame, self.folder, entries)
+
+    def documents(self, relatiecode="H001"):
+        frame = pd.DataFrame({column: ["x", "x"] for column in DOCUMENT_COLUMNS})
+        frame['dagboek_dagboek (H)'] = "VK"
+        frame['boekjaar_boekjaar (H)'] = 2024
+        frame['factuur (H)'] = [1, 2]
+        frame['relaties_code (H)'] = [relatiecode, "H002"]
+        return frame
+
+    def test_an_importable_file_is_recorded(self):
+        saved_path = self.save(self.documents())
+        self.assertTrue(os.path.exists(saved_path))
+        self.assertEqual(read_ledger(self.path)['Nummer'].tolist(), ["1", "2"])
+
+    def test_a_file_with_empty_cells_leaves_the_ledger_unchanged(self):
+        self.save(self.documents())
+        changed = self.documents(relatiecode=None)
+        changed['tebet (H)'] = "y"
+        saved_path = self.save(changed)
+        self.assertIn("withemptycells", os.path.basename(saved_path))
+        self.assertEqual(len(read_ledger(self.path)), 2)
+        entries = converter.BILLIT_LEDGER.entries(changed)
+        self.assertEqual(converter.BILLIT_LEDGER.new_or_changed(entries).tolist(), [True, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+
+from metrics import ConversionMetrics
+
+
+class TestConversionMetrics(unittest.TestCase):
+
+    def test_a_stage_recorded_twice_adds_up_time_and_rows(self):
+        metrics = ConversionMetrics("Erelonen", "erelonen.xlsx").start()
+        metrics.record("read", 30)
+        metrics.record("build", 10)
+        first = metrics.stages["build"].seconds
+        metrics.record("build", 20)
+        self.assertEqual(metrics.stages["build"].rows, 30)
+        self.assertGreaterEqual(metrics.stages["build"].seconds, first)
+        self.assertEqual(metrics.stages["read"].rows, 30)
+
+    def test_stages_keep_their_order(self):
+        metrics = ConversionMetrics("Billit", "billit.xlsx").start()
+        for stage in ["read", "lookup", "build", "lookup"]:
+            metrics.record(stage, 5)
+        metrics.finish("ok")
+        self.assertEqual([stage["stage"] for stage in metrics.to_dict()["stages"]], ["read", "lookup", "build"])
+        self.assertEqual(metrics.to_dict()["stages"][1]["rows"], 10)
+        self.assertEqual(metrics.status, "ok")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from reference import ReferenceFile, ReferenceValidator, read_relatiecodes
+from textrepair import clean_text
+
+
+def reference(*rows):
+    return pd.DataFrame(rows, columns=['Name', 'Relatiecode'], dtype=object)
+
+
+class TestReferenceValidator(unittest.TestCase):
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.file = ReferenceFile(os.path.join(folder.name, "relatiecodes.csv"), read_relatiecodes)
+
+    def validator(self, *rows, normalize=clean_text):
+        self.file.save(reference(*rows))
+        return ReferenceValidator(self.file, normalize=normalize)
+
+    def test_a_name_with_one_code_is_valid(self):
+        validator = self.validator(("Bedrijf A", "H001"), ("Bedrijf A", "H001"), ("Bedrijf B", "H001"))
+        self.assertEqual(validator.conflicts(), [])
+
+    def test_a_name_with_two_codes_is_a_conflict(self):
+        validator = self.validator(("Bedrijf A", "H001"), ("Bedrijf A", "H002"), ("Bedrijf B", "H003"))
+        self.assertEqual(validator.conflicts(), ["Bedrijf A"])
+
+    def test_names_are_compared_normalized(self):
+        validator = self.validator(("Bedrijf A", "H001"), ("Bedrijf Ä ", "H002"))
+        self.assertEqual(validator.conflicts(), ["Bedrijf A"])
+        validator = self.validator(("Bedrijf A", "H001"), ("Bedrijf Ä ", "H002"), normalize=None)
+        self.assertEqual(validator.conflicts(), [])
+
+    def test_rows_without_a_name_or_code_are_ignored(self):
+        validator = self.validator(("Bedrijf A", "H001"), ("Bedrijf A", None), (None, "H002"))
+        self.assertEqual(validator.conflicts(), [])
+
+    def test_appended_rows_are_checked(self):
+        validator = self.validator(("Bedrijf A", "H001"))
+        self.assertEqual(validator.conflicts(), [])
+        self.file.append(reference(("Bedrijf A", "H002")))
+        self.assertEqual(validator.conflicts(), ["Bedrijf A"])
+
+    def test_an_edit_can_solve_a_conflict(self):
+        validator = self.validator(("Bedrijf A", "H001"), ("Bedrijf A", "H002"))
+        self.assertEqual(validator.conflicts(), ["Bedrijf A"])
+        self.file.update([(("Bedrijf A", "H002"), ("Bedrijf A", "H001"))])
+        self.assertEqual(validator.conflicts(), [])
+
+    def test_a_rename_can_make_a_conflict(self):
+        validator = self.validator(("Bedrijf A", "H001"), ("Bedrijf B", "H002"))
+        self.assertEqual(validator.conflicts(), [])
+        self.file.update([(("Bedrijf B", "H002"), ("Bedrijf A", "H002"))])
+        self.assertEqual(validator.conflicts(), ["Bedrijf A"])
+
+    def test_removed_rows_are_counted_again(self):
+        validator = self.validator(("Bedrijf A", "H001"), ("Bedrijf A", "H002"))
+        self.assertEqual(validator.conflicts(), ["Bedrijf A"])
+        self.file.save(reference(("Bedrijf A", "H001")))
+        self.assertEqual(validator.conflicts(), [])
+
+    def test_incremental_result_matches_a_fresh_validator(self):
+        validator = self.validator(("Bedrijf A", "H001"), ("Bedrijf B", "H002"), ("Bedrijf C", "H003"))
+        validator.conflicts()
+        self.file.append(reference(("Bedrijf B", "H009"), ("Bedrijf D", "H004")))
+        self.file.update([(("Bedrijf C", "H003"), ("Bedrijf A", "H005")),
+                          (("Bedrijf B", "H009"), ("Bedrijf B", "H002"))])
+        self.assertEqual(validator.conflicts(), ReferenceValidator(self.file, normalize=clean_text).conflicts())
+        self.assertEqual(validator.conflicts(), ["Bedrijf A"])
+
+
+if __name__ == "__main__":
+    unittest.main()
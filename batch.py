@@ -0,0 +1,205 @@
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import converter
+import readers
+
+EXCEL_EXTENSIONS = (".xlsx", ".xls")
+
+
+def current_settings():
+    """
+    The conversion settings of this process. Worker processes started with spawn (Windows, macOS) do not inherit
+    the module globals, so every job carries them and convert_job applies them again.
+    """
+    return {
+        "engine": readers.ENGINE,
+        "intermediate_format": converter.INTERMEDIATE_FORMAT,
+        "output_format": converter.OUTPUT_FORMAT,
+        "incremental": converter.INCREMENTAL,
+        "reference_db": converter.REFERENCE_DB.path if converter.REFERENCE_DB is not None else None,
+        "fuzzy_matches": converter.uses_fuzzy_matches(),
+    }
+
+
+def apply_settings(settings):
+    """Applies settings from current_settings in this process."""
+    readers.set_engine(settings["engine"])
+    converter.set_intermediate_format(settings["intermediate_format"])
+    converter.set_output_format(settings["output_format"])
+    converter.set_incremental(settings["incremental"])
+    if current_settings()["reference_db"] != settings["reference_db"]:
+        converter.set_reference_store(settings["reference_db"])
+
+
+class BatchJob:
+    """One input file of a batch, with its conversion type, output folder and the conversion settings."""
+
+    def __init__(self, conversion_type, input_path, output_folder_path, month=None, year=None, end_month=None,
+                 end_year=None, settings=None):
+        self.conversion_type = conversion_type
+        self.input_path = input_path
+        self.output_folder_path = output_folder_path
+        self.month = month
+        self.year = year
+        self.end_month = end_month
+        self.end_year = end_year
+        self.settings = current_settings() if settings is None else settings
+
+
+class BatchResult:
+    """
+    Outcome of one BatchJob: the converted file, the log lines, the names that had no code and the names the
+    worker normalized for the name cache. ok is also True for a conversion that had nothing new to save.
+    """
+
+    def __init__(self, job, saved_path, log_lines, pending, ok=None, new_names=None):
+        self.job = job
+        self.saved_path = saved_path
+        self.ok = saved_path is not None if ok is None else ok
+        self.log_lines = log_lines
+        self.pending = pending
+        self.new_names = new_names or {}
+
+
+def convert_job(job):
+    """
+    Runs one conversion in a worker process, collecting missing codes instead of prompting.
+    The new names are returned instead of written, only the parent process writes the name cache file.
+    """
+    log_lines = []
+    policy = converter.MissingCodePolicy("pending", job.settings["fuzzy_matches"])
+    converter.set_log_handler(log_lines.append)
+    converter.set_code_prompt(policy)
+    converter.set_save_name_cache(False)
+    apply_settings(job.settings)
+    try:
+        saved_path = converter.run_conversion(job.conversion_type, job.input_path, job.output_folder_path,
+                                              job.month, job.year, job.end_month, job.end_year)
+        ok = converter.conversion_ok()
+    except Exception as e:
+        log_lines.append(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - Error converting {job.input_path}: {e}")
+        saved_path = None
+        ok = False
+    return BatchResult(job, saved_path, log_lines, policy.pending, ok, converter.NAME_CACHE.take_new_names())
+
+
+def convert_jobs_in_order(jobs):
+    """Runs conversions one after another in one worker process."""
+    return [convert_job(job) for job in jobs]
+
+
+def uses_ledger(job):
+    """True for an incremental Billit job, which reads and appends to the Billit ledger."""
+    return job.conversion_type == "Billit" and job.settings["incremental"]
+
+
+def collect_input_files(paths):
+    """Expands the given files and folders into a list of Excel files."""
+    input_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            input_files.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(EXCEL_EXTENSIONS) and not name.startswith("~$")
+            ))
+        else:
+            input_files.append(path)
+    return input_files
+
+
+def make_jobs(inputs, output_folder, month=None, year=None, end_month=None, end_year=None):
+    """
+    Builds the BatchJobs for a list of (conversion_type, path) pairs, where path is a file or a folder.
+    Every input file gets its own subfolder in the HH_MM output folder.
+    """
+    files = [(conversion_type, input_path) for conversion_type, path in inputs
+             for input_path in collect_input_files([path])]
+    names = output_subfolders([input_path for _, input_path in files])
+    return [BatchJob(conversion_type, input_path, os.path.join(output_folder, name), month, year, end_month, end_year)
+            for (conversion_type, input_path), name in zip(files, names)]
+
+
+def output_subfolders(input_paths):
+    """
+    Returns the name of the output subfolder of each input file: the file name without its extension. Files with
+    the same name in different folders get _2, _3, ... added in their order, so they do not overwrite each other.
+    Names are compared without case, like on Windows.
+    """
+    names = []
+    used = set()
+    for input_path in input_paths:
+        stem = os.path.splitext(os.path.basename(input_path))[0]
+        name, number = stem, 1
+        while name.casefold() in used:
+            number += 1
+            name = f"{stem}_{number}"
+        used.add(name.casefold())
+        names.append(name)
+    return names
+
+
+def run_jobs(jobs, max_workers=None):
+    """
+    Runs the jobs on a process pool and forwards their log lines in job order.
+    Incremental Billit jobs run one after another in a single worker, so each one sees the invoices the previous
+    ones exported. The names the workers normalized are saved to the name cache here, once.
+    """
+    if not jobs:
+        return []
+    ordered = [index for index, job in enumerate(jobs) if uses_ledger(job)]
+    parallel = [index for index, job in enumerate(jobs) if not uses_ledger(job)]
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        ordered_results = None
+        if ordered:
+            ordered_results = pool.submit(convert_jobs_in_order, [jobs[index] for index in ordered])
+        for index, result in zip(parallel, pool.map(convert_job, [jobs[index] for index in parallel])):
+            results[index] = result
+        if ordered_results is not None:
+            for index, result in zip(ordered, ordered_results.result()):
+                results[index] = result
+    for result in results:
+        converter.NAME_CACHE.add_names(result.new_names)
+        for line in result.log_lines:
+            converter.log_line(line)
+    converter.NAME_CACHE.save()
+    return results
+
+
+def run_batch(jobs, output_folder, max_workers=None, prompt=None):
+    """
+    Converts all jobs in parallel. Names without a code are collected over all files.
+    With a prompt, the codes are asked once for the whole batch and the affected files are converted again;
+    without one, the names are written to a single pending_codes.csv in output_folder.
+    Returns the BatchResults in job order.
+    """
+    converter.initialize_grootboekrekeningen_file()
+    converter.ensure_save_folder_exists(output_folder)
+
+    results = run_jobs(jobs, max_workers)
+    pending = list(dict.fromkeys(item for result in results for item in result.pending))
+
+    if pending and prompt is not None:
+        resolved = set()
+        for i, (kind, name) in enumerate(pending, start=1):
+            code = prompt(kind, name, i, len(pending))
+            if code:
+                converter.add_code(kind, name, code)
+                resolved.add((kind, name))
+
+        rerun = [index for index, result in enumerate(results) if resolved.intersection(result.pending)]
+        if rerun:
+            converter.log_message(f"Converting {len(rerun)} files again with the entered codes.")
+            for index, result in zip(rerun, run_jobs([jobs[index] for index in rerun], max_workers)):
+                results[index] = result
+        pending = list(dict.fromkeys(item for result in results for item in result.pending))
+
+    converter.write_pending_codes(pending, output_folder)
+
+    for result in results:
+        if not result.ok:
+            converter.log_message(f"Conversion failed for {result.job.input_path}")
+    return results
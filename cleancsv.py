@@ -1,63 +1,173 @@
-import pandas as pd
-from tkinter import filedialog, messagebox
-import tkinter as tk
+"""
+Removes duplicates from relatiecode CSV files and merges several of them into one reference file.
 
+The input files are read in chunks and every name is reduced to its clean_text key, the form the conversions look
+names up by. The key only finds the duplicates, the first spelling of a name is the one written out. Only a hash
+map from key to code is kept in memory, so large merged dumps do not have to fit in memory as a whole. A name
+with two different codes is a conflict, the same rule validate_reference_file enforces: the first code wins and
+the others are written to a conflict report.
 
-# Function to select the CSV file
-def select_csv_file():
-    file_path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
-    return file_path
+    python cleancsv.py relatiecodes.csv sgosjgir.csv -o merged.csv
 
+Without arguments a small window asks for the files.
+"""
+import argparse
+import os
+import sys
 
-# Function to save the cleaned CSV file
-def save_cleaned_csv_file(cleaned_df):
-    save_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
-    if save_path:
-        cleaned_df.to_csv(save_path, index=False, sep=';', encoding='utf-8')
-        messagebox.showinfo("Success", f"Cleaned CSV file saved at: {save_path}")
-    else:
-        messagebox.showwarning("Warning", "No save location selected.")
+import numpy as np
+import pandas as pd
 
+from textrepair import clean_text, detect_encoding
+
+CHUNK_SIZE = 50000
+REFERENCE_COLUMNS = ['Name', 'Relatiecode']
+CONFLICT_COLUMNS = ['File', 'Row', 'Name', 'Relatiecode', 'Kept Relatiecode']
+
+
+def conflicts_path(output_path):
+    root, ext = os.path.splitext(output_path)
+    return f"{root}_conflicts{ext or '.csv'}"
+
+
+class MergeResult:
+    """Counts of a merge and the paths that were written."""
+
+    def __init__(self, output_path, conflicts_path):
+        self.output_path = output_path
+        self.conflicts_path = conflicts_path
+        self.rows = 0
+        self.written = 0
+        self.duplicates = 0
+        self.conflicts = 0
+        self.without_code = 0
+        self.without_name = 0
+
+    def summary(self):
+        text = (f"Read {self.rows} rows, wrote {self.written} unique names to {self.output_path}, "
+                f"dropped {self.duplicates} duplicates")
+        if self.conflicts:
+            text += f", {self.conflicts} names with another code, see {self.conflicts_path}"
+        if self.without_code:
+            text += f", skipped {self.without_code} names without a code"
+        if self.without_name:
+            text += f", skipped {self.without_name} rows without a name"
+        return text + "."
+
+
+def read_chunks(path, chunksize=CHUNK_SIZE):
+    """
+    Reads a reference CSV in chunks with its detected encoding, after checking that it has the 'Name' and
+    'Relatiecode' columns.
+    """
+    encoding = detect_encoding(path)
+    header = pd.read_csv(path, delimiter=';', encoding=encoding, nrows=0).columns.str.strip()
+    if list(header[:2]) != REFERENCE_COLUMNS:
+        raise ValueError(f"{path} must start with the columns 'Name' and 'Relatiecode', found {list(header)}")
+    return pd.read_csv(path, delimiter=';', encoding=encoding, dtype=str, usecols=[0, 1], names=REFERENCE_COLUMNS,
+                       header=0, chunksize=chunksize)
+
+
+def merge_reference_files(input_paths, output_path, chunksize=CHUNK_SIZE):
+    """
+    Streams the input files in order and writes every clean_text key once, with the first name and code found
+    for it. The key is only used to find duplicates, the name is written as it was spelled in the input. Rows
+    without a name or a code are skipped, rows with a known key and another code are written to the conflict
+    report. Returns a MergeResult.
+    """
+    for path in input_paths:
+        if os.path.exists(output_path) and os.path.samefile(path, output_path):
+            raise ValueError(f"The output file {output_path} is also an input file, choose another output file")
+
+    result = MergeResult(output_path, conflicts_path(output_path))
+    codes = {}
+    pd.DataFrame(columns=REFERENCE_COLUMNS).to_csv(output_path, sep=';', index=False, encoding='utf-8')
+    if os.path.exists(result.conflicts_path):
+        os.remove(result.conflicts_path)
+
+    for path in input_paths:
+        for chunk in read_chunks(path, chunksize):
+            result.rows += len(chunk)
+            chunk['Relatiecode'] = chunk['Relatiecode'].str.strip().replace('', np.nan)
+            without_name = chunk['Name'].isna() | (chunk['Name'].str.strip() == '')
+            result.without_name += int(without_name.sum())
+            result.without_code += int((~without_name & chunk['Relatiecode'].isna()).sum())
+            chunk = chunk[~without_name]
+            chunk = chunk.dropna(subset=REFERENCE_COLUMNS)
+            # The chunk index counts the data rows of the file, the header is row 1
+            chunk.insert(0, 'Row', chunk.index + 2)
+            names = chunk['Name'].unique()
+            chunk['Key'] = chunk['Name'].map(dict(zip(names, map(clean_text, names))))
+
+            unique = chunk.drop_duplicates(subset=['Key', 'Relatiecode'])
+            new = unique['Key'].map(lambda key: key not in codes).astype(bool)
+            first = unique[new & ~unique['Key'].duplicated()]
+            codes.update(zip(first['Key'], first['Relatiecode']))
+            first[REFERENCE_COLUMNS].to_csv(output_path, sep=';', index=False, encoding='utf-8', mode='a',
+                                            header=False)
+            result.written += len(first)
+
+            # Both sides are codes without NaN, so ne only marks real differences
+            kept = unique['Key'].map(codes)
+            other_code = kept.ne(unique['Relatiecode'])
+            conflicts = unique[other_code].assign(File=os.path.basename(path),
+                                                  **{'Kept Relatiecode': kept[other_code]})
+            if not conflicts.empty:
+                conflicts[CONFLICT_COLUMNS].to_csv(result.conflicts_path, sep=';', index=False, encoding='utf-8',
+                                                   mode='a', header=not os.path.exists(result.conflicts_path))
+                result.conflicts += len(conflicts)
+            result.duplicates += len(chunk) - len(first) - len(conflicts)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove duplicates from relatiecode CSV files and merge them.")
+    parser.add_argument("inputs", nargs="+", help="Reference CSV files, the first file wins on conflicts")
+    parser.add_argument("-o", "--output", required=True, help="Merged reference CSV file")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows read at a time")
+    args = parser.parse_args(argv)
 
-# Function to clean the CSV file (remove duplicates)
-def clean_csv_file(file_path):
     try:
-        # Load the CSV file
-        df = pd.read_csv(file_path, delimiter=';', encoding='utf-8')
-
-        # Ensure it has exactly 2 columns ('Name' and 'Relatiecode')
-        if list(df.columns) != ['Name', 'Relatiecode']:
-            raise ValueError("CSV file must have exactly 2 columns: 'Name' and 'Relatiecode'")
-
-        # Remove duplicate rows
-        cleaned_df = df.drop_duplicates()
-
-        # Save the cleaned CSV file
-        save_cleaned_csv_file(cleaned_df)
-
-    except Exception as e:
-        messagebox.showerror("Error", f"An error occurred: {e}")
-
-
-# Main function to select, clean, and save the CSV file
-def process_csv_file():
-    # Select the reference CSV file
-    file_path = select_csv_file()
-    if not file_path:
-        messagebox.showwarning("Warning", "No file selected.")
-        return
-
-    # Clean the CSV file
-    clean_csv_file(file_path)
-
-
-# GUI setup using tkinter
-root = tk.Tk()
-root.title("CSV File Cleaner")
-
-# GUI button to trigger the file processing
-button = tk.Button(root, text="Select and Clean CSV File", command=process_csv_file, width=30, height=2)
-button.pack(pady=20)
-
-# Start the GUI loop
-root.mainloop()
+        result = merge_reference_files(args.inputs, args.output, args.chunk_size)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(result.summary())
+    return 0
+
+
+def run_gui():
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+
+    def process_csv_files():
+        # Select the reference CSV files
+        file_paths = filedialog.askopenfilenames(filetypes=[("CSV files", "*.csv")])
+        if not file_paths:
+            messagebox.showwarning("Warning", "No file selected.")
+            return
+        save_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        if not save_path:
+            messagebox.showwarning("Warning", "No save location selected.")
+            return
+        try:
+            result = merge_reference_files(file_paths, save_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred: {e}")
+            return
+        messagebox.showinfo("Success", result.summary())
+
+    root = tk.Tk()
+    root.title("CSV File Cleaner")
+
+    # GUI button to trigger the file processing
+    button = tk.Button(root, text="Select and Clean CSV Files", command=process_csv_files, width=30, height=2)
+    button.pack(pady=20)
+
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    run_gui()
@@ -0,0 +1,102 @@
+import argparse
+import os
+import sys
+
+from datetime import datetime
+
+import batch
+import converter
+import readers
+
+from refstore import REFERENCE_DB_FILE
+
+CONVERSION_TYPES = {"billit": "Billit", "erelonen": "Erelonen", "rappels": "Rappels"}
+
+
+def output_folders_for(output_folder, input_files):
+    """Returns the output folder of each input file; several inputs get a subfolder each, with a unique name."""
+    if len(input_files) == 1:
+        return [output_folder]
+    return [os.path.join(output_folder, name) for name in batch.output_subfolders(input_files)]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Convert Billit, Erelonen and Rappels exports without the GUI.")
+    parser.add_argument("type", choices=sorted(CONVERSION_TYPES), help="Conversion type")
+    parser.add_argument("inputs", nargs="+", help="Input Excel files or folders with Excel files")
+    parser.add_argument("-o", "--output", required=True, help="Output folder, a HH_MM subfolder is created in it")
+    parser.add_argument("--month", type=int, default=datetime.now().month, help="Month to convert (Erelonen)")
+    parser.add_argument("--year", type=int, default=datetime.now().year, help="Year to convert (Erelonen)")
+    parser.add_argument("--to-month", type=int, default=None,
+                        help="Erelonen: convert every month up to this one, one file per month")
+    parser.add_argument("--to-year", type=int, default=None,
+                        help="Erelonen: convert every month up to --to-month of this year, one file per month")
+    parser.add_argument("--missing-codes", choices=["fail", "skip", "pending"], default="fail",
+                        help="What to do with names that have no Relatiecode or Grootboekrekening")
+    parser.add_argument("--engine", choices=["calamine", "openpyxl"],
+                        help="Excel reader engine, by default calamine when it is installed")
+    parser.add_argument("--output-format", choices=["xlsx", "csv"], default="xlsx",
+                        help="Write the converted file as xlsx or as semicolon CSV for the accounting import")
+    parser.add_argument("--keep-intermediate", choices=["xlsx", "csv", "parquet", "feather"],
+                        help="Also write the prepared DataFrame of each conversion in this format")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Billit: only convert invoices that are new or changed since earlier runs")
+    parser.add_argument("--reference-db", default=REFERENCE_DB_FILE if os.path.exists(REFERENCE_DB_FILE) else None,
+                        help="Keep the reference tables in this SQLite database instead of the CSV files, "
+                             f"used by default when {REFERENCE_DB_FILE} exists")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of worker processes for several input files, 0 uses all CPUs. "
+                             "In parallel runs missing codes are collected into one pending_codes.csv")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    readers.set_engine(args.engine)
+    converter.set_intermediate_format(args.keep_intermediate)
+    converter.set_output_format(args.output_format)
+    converter.set_incremental(args.incremental)
+    if args.reference_db:
+        converter.set_reference_store(args.reference_db)
+    policy = converter.MissingCodePolicy(args.missing_codes)
+    converter.set_code_prompt(policy)
+
+    input_files = batch.collect_input_files(args.inputs)
+    if not input_files:
+        converter.log_message("No input files found.")
+        return 1
+
+    output_folder = os.path.join(args.output, datetime.now().strftime("%H_%M"))
+    if args.jobs != 1 and len(input_files) > 1:
+        return run_parallel(args, input_files, output_folder)
+
+    failed = []
+    for input_path, input_output_folder in zip(input_files, output_folders_for(output_folder, input_files)):
+        converter.log_message(f"Converting {input_path}")
+        saved_path = converter.run_conversion(CONVERSION_TYPES[args.type], input_path, input_output_folder,
+                                              args.month, args.year, args.to_month, args.to_year)
+        if saved_path is None and not converter.conversion_ok():
+            failed.append(input_path)
+
+    converter.ensure_save_folder_exists(output_folder)
+    policy.write_pending(output_folder)
+
+    for input_path in failed:
+        converter.log_message(f"Conversion failed for {input_path}")
+    return 1 if failed else 0
+
+
+def run_parallel(args, input_files, output_folder):
+    """Converts the input files on a process pool with one consolidated pending_codes.csv."""
+    jobs = batch.make_jobs([(CONVERSION_TYPES[args.type], path) for path in input_files], output_folder,
+                           args.month, args.year, args.to_month, args.to_year)
+    results = batch.run_batch(jobs, output_folder, max_workers=args.jobs or None)
+    failed = [result for result in results if not result.ok]
+    pending = [result for result in results if result.pending]
+    if failed or (args.missing_codes == "fail" and pending):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1340 @@
+import csv
+import os
+import threading
+import pandas as pd
+import readers
+import writers
+
+from datetime import datetime
+
+from Document import (BTW_DETAIL_COLUMNS, build_document_frame, btw_exception_details, classify_btw,
+                      set_btw_rates)
+from fuzzy import digit_tokens
+from ledger import ConversionLedger, read_ledger
+from metrics import ConversionMetrics
+from namecache import NameCache
+from reference import (ReferenceFile, ReferenceValidator, RelatiecodeIndex, read_grootboekrekeningen,
+                       read_relatiecodes)
+from refstore import ReferenceDatabase
+from textrepair import clean_text
+from validation import find_missing_values
+
+RELATIECODES_FILE = "relatiecodes.csv"
+GROOTBOEKREKENINGEN_FILE = "grootboekrekeningen.csv"
+NORMALIZED_NAMES_FILE = "normalized_names_v2.csv"  # Bump the version when clean_text changes
+BILLIT_LEDGER_FILE = "billit_ledger.csv"
+BTW_RATES_FILE = "btw_rates.csv"  # Optional rate table with the columns Rate (in percent) and Code
+
+# Reference files are read on first use and cached until they change on disk
+RELATIECODES = ReferenceFile(RELATIECODES_FILE, read_relatiecodes)
+GROOTBOEKREKENINGEN = ReferenceFile(GROOTBOEKREKENINGEN_FILE, read_grootboekrekeningen)
+RELATIECODES_INDEX = RelatiecodeIndex(RELATIECODES, clean_text)
+RELATIECODES_VALIDATOR = ReferenceValidator(RELATIECODES, normalize=clean_text)
+REFERENCE_DB = None  # ReferenceDatabase when the reference tables are kept in SQLite
+BILLIT_LEDGER = ConversionLedger(ReferenceFile(BILLIT_LEDGER_FILE, read_ledger))
+# Every distinct name is cleaned once, results are shared between runs through NORMALIZED_NAMES_FILE
+NAME_CACHE = NameCache(NORMALIZED_NAMES_FILE, clean_text)
+
+HIGHEST = None
+LOWEST = None
+
+EXPECTED_COLUMNS_BILLIT = [
+    "Order nummer", "Datum", "Vervaldag", "Totaal inclusief", "Totaal exclusief", "Relatiecode"
+]
+
+EXPECTED_COLUMNS_ERELONEN = [
+    "Gebouw", "Factuurnr", "Totaal brutto", "Totaal netto", "Totaal BTW", "Vervaldag", "Betaald", "Documentnummer",
+    "Documentdatum", "Relatiecode"
+]
+
+EXPECTED_COLUMNS_RAPPELS = [
+    "Gebouw", "Relatiecode", "Factuurnr", "Totaal brutto", "Totaal netto", "Totaal BTW", "Doc nr", "Documentdatum"
+]
+
+# Columns parsed from the raw input files, everything else in the workbook is skipped
+READ_COLUMNS_BILLIT = [column for column in EXPECTED_COLUMNS_BILLIT if column != "Relatiecode"] + [
+    "Bedrijf", "Betreft", "Factuurnr"
+]
+READ_COLUMNS_ERELONEN_EXPORT = list(range(9))
+READ_COLUMNS_RAPPELS = EXPECTED_COLUMNS_RAPPELS + ["Factuurnummer"]
+
+
+INTERMEDIATE_FORMAT = None  # None, "xlsx", "csv", "parquet" or "feather"
+OUTPUT_FORMAT = "xlsx"  # "xlsx" or "csv" for the semicolon import file
+INCREMENTAL = False  # Only convert Billit invoices that are not in BILLIT_LEDGER yet, or that changed
+SAVE_NAME_CACHE = True  # Batch workers hand their new names to the parent process instead of writing the file
+
+LOG_HANDLER = None
+CODE_PROMPT = None
+CODE_REVIEW = None
+PROGRESS_HANDLER = None
+CANCEL_EVENT = threading.Event()
+
+AUTO_ACCEPT_SCORE = 0.9  # Fuzzy matches from this score on are proposed as a clear match
+AUTO_ACCEPT_MARGIN = 0.1  # ...when the next candidate with another code scores at least this much lower
+REVIEW_MIN_SCORE = 0.4  # Weaker fuzzy matches are not proposed
+# Pasted lines with only these words are header rows, compared without case
+PASTE_HEADERS = {"name", "naam", "kind", "code", "relatiecode", "grootboekrekening"}
+
+STAGES = ["read", "lookup", "relatiecodes", "build", "validate", "save"]
+
+METRICS = None  # ConversionMetrics of the running or the last conversion
+NOTHING_TO_SAVE = False  # The last conversion succeeded without a file, an incremental run without new invoices
+
+month_mapping = {
+    "January": 1,
+    "February": 2,
+    "March": 3,
+    "April": 4,
+    "May": 5,
+    "June": 6,
+    "July": 7,
+    "August": 8,
+    "September": 9,
+    "October": 10,
+    "November": 11,
+    "December": 12
+}
+
+
+class MissingCodeError(ValueError):
+    """Raised when a Relatiecode or Grootboekrekening is missing and no prompt is installed."""
+
+    def __init__(self, kind, name):
+        super().__init__(f"Missing {kind} for {name}")
+        self.kind = kind
+        self.name = name
+
+
+class ConfigurationError(ValueError):
+    """Raised when a configuration file next to the program, e.g. BTW_RATES_FILE, cannot be used."""
+
+
+def set_log_handler(handler):
+    """Installs the function that receives log lines, e.g. the logbook of the GUI. None prints to stdout."""
+    global LOG_HANDLER
+    LOG_HANDLER = handler
+
+
+def log_message(message):
+    log_line(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}")
+
+
+def log_line(line):
+    """Passes an already timestamped log line to the installed handler."""
+    if LOG_HANDLER is None:
+        print(line)
+    else:
+        LOG_HANDLER(line)
+
+
+class ConversionCancelled(BaseException):
+    """
+    Raised at the next stage boundary after request_cancel().
+    Derives from BaseException so the broad 'except Exception' handlers of the pipeline do not swallow it.
+    """
+
+
+def set_progress_handler(handler):
+    """Installs the function that is called as handler(stage, rows) when a stage of a conversion finishes."""
+    global PROGRESS_HANDLER
+    PROGRESS_HANDLER = handler
+
+
+def report_progress(stage, rows):
+    """Reports a finished stage and stops the conversion here if a cancel was requested."""
+    if METRICS is not None and METRICS.status is None:
+        METRICS.record(stage, rows)
+    if CANCEL_EVENT.is_set():
+        raise ConversionCancelled()
+    if PROGRESS_HANDLER is not None:
+        PROGRESS_HANDLER(stage, rows)
+
+
+def request_cancel():
+    """Asks the running conversion to stop at its next stage boundary."""
+    CANCEL_EVENT.set()
+
+
+def set_code_prompt(prompt):
+    """
+    Installs the function that asks for missing codes.
+    It is called as prompt(kind, name, position, total) and returns the code, or None to leave it missing.
+    Without a prompt, a missing code raises MissingCodeError.
+    """
+    global CODE_PROMPT
+    CODE_PROMPT = prompt
+
+
+def set_code_review(review):
+    """
+    Installs the function that resolves all missing codes of a kind in one batch, e.g. the batch entry screen.
+    It is called as review(kind, items) with a list of (name, [FuzzyMatch]), where the candidates may be empty, and
+    returns a dict name -> code. Names it leaves out stay without a code.
+    Without a review function, the codes are asked one by one through the code prompt.
+    """
+    global CODE_REVIEW
+    CODE_REVIEW = review
+
+
+class MissingCodePolicy:
+    """
+    Non-interactive replacement for the missing code dialogs.
+    - fail: stop the conversion at the first missing code
+    - skip: leave the code empty and continue
+    - pending: leave the code empty and collect the name for pending_codes.csv
+    Clear fuzzy matches are used without a review, except under fail. fuzzy_matches overrides this, e.g. for the
+    pending policy of batch workers started under fail.
+    """
+
+    def __init__(self, mode, fuzzy_matches=None):
+        self.mode = mode
+        self.fuzzy_matches = mode != "fail" if fuzzy_matches is None else fuzzy_matches
+        self.pending = []
+
+    def __call__(self, kind, name, position, total):
+        if self.mode == "fail":
+            raise MissingCodeError(kind, name)
+        if self.mode == "pending":
+            self.pending.append((kind, name))
+        return None
+
+    def write_pending(self, folder):
+        """Writes the collected names to pending_codes.csv, in the layout of the reference files."""
+        return write_pending_codes(self.pending, folder)
+
+
+def uses_fuzzy_matches():
+    """
+    True when clear fuzzy matches may be used without a review. Not when a missing code stops the conversion:
+    without a prompt, or under a policy that refuses them.
+    """
+    if isinstance(CODE_PROMPT, MissingCodePolicy):
+        return CODE_PROMPT.fuzzy_matches
+    return CODE_PROMPT is not None
+
+
+def write_pending_codes(pending, folder):
+    """Writes (kind, name) pairs without a code to pending_codes.csv in folder."""
+    if not pending:
+        return None
+    pending_file = os.path.join(folder, "pending_codes.csv")
+    with open(pending_file, "w", encoding="utf-8") as f:
+        f.write("Kind;Name;Code\n")
+        for kind, name in dict.fromkeys(pending):
+            f.write(f"{kind};{name};\n")
+    log_message(f"Pending codes written to {pending_file}")
+    return pending_file
+
+
+def add_code(kind, name, code):
+    """Stores a code entered for a missing 'Relatiecode' or 'Grootboekrekening' in its reference file."""
+    if kind == "Relatiecode":
+        RELATIECODES_INDEX.add(name, code)
+    else:
+        GROOTBOEKREKENINGEN.append(pd.DataFrame({'Code': [name], 'Grootboekrekening': [code]}))
+
+
+def ask_code(kind, name, position, total):
+    """Asks the installed prompt for a missing 'Relatiecode' or 'Grootboekrekening'."""
+    if CODE_PROMPT is None:
+        raise MissingCodeError(kind, name)
+    return CODE_PROMPT(kind, name, position, total)
+
+
+def load_reference_df():
+    """Returns an editable copy of the cached reference DataFrame."""
+    try:
+        reference_df = RELATIECODES.frame().copy()
+        return reference_df
+    except Exception as e:
+        log_message(f"142: Error loading the reference file: {e}")
+        return pd.DataFrame(columns=['Name', 'Relatiecode'])
+
+
+def save_reference_edits(edits):
+    """
+    Saves the rows changed in the reference editor, a list of ((name, code), (new name, new code)).
+    The SQLite store raises ValueError for a rename to a name that already has another code.
+    """
+    RELATIECODES.update(edits)
+
+
+def set_reference_store(db_path):
+    """
+    Keeps the relatiecodes and grootboekrekeningen in the SQLite database db_path instead of the CSV files,
+    None goes back to the CSV files. Tables that are still empty are filled from the CSV files first.
+    """
+    global RELATIECODES, GROOTBOEKREKENINGEN, RELATIECODES_INDEX, RELATIECODES_VALIDATOR, REFERENCE_DB
+    if db_path is None:
+        REFERENCE_DB = None
+        RELATIECODES = ReferenceFile(RELATIECODES_FILE, read_relatiecodes)
+        GROOTBOEKREKENINGEN = ReferenceFile(GROOTBOEKREKENINGEN_FILE, read_grootboekrekeningen)
+    else:
+        REFERENCE_DB = ReferenceDatabase(db_path)
+        RELATIECODES = REFERENCE_DB.table("relatiecodes")
+        GROOTBOEKREKENINGEN = REFERENCE_DB.table("grootboekrekeningen")
+        for table, csv_file in [(RELATIECODES, RELATIECODES_FILE), (GROOTBOEKREKENINGEN, GROOTBOEKREKENINGEN_FILE)]:
+            if table.is_empty() and os.path.exists(csv_file):
+                stored, refused = table.import_csv(csv_file)
+                log_message(f"Imported {stored} rows from {csv_file} into {db_path}")
+                if not refused.empty:
+                    log_message(f"Warning: Refused {len(refused)} rows of names with more than one code: "
+                                f"{sorted(refused.iloc[:, 0].unique())}")
+    RELATIECODES_INDEX = RelatiecodeIndex(RELATIECODES, clean_text)
+    RELATIECODES_VALIDATOR = ReferenceValidator(RELATIECODES, normalize=clean_text)
+
+
+def check_missing_values_in_columns(df, conversion_folder, filter_column=None):
+    """
+    Finds the empty cells of the required columns and writes them to missing_values.txt.
+    Returns a MissingValuesReport, which is falsy when every required cell is filled in.
+    """
+    report = find_missing_values(df, filter_column=filter_column)
+    report_progress("validate", len(df))
+    report.write(os.path.join(conversion_folder, "missing_values.txt"))
+    return report
+
+
+def match_relatiecodes(names):
+    """
+    Looks for the Relatiecodes of unknown names with the fuzzy index of RELATIECODES_INDEX.
+    Returns the clear matches and the other names, both as a list of (name, [FuzzyMatch]) with the candidates.
+    A match is only clear when it has the same numbers as the name, 'SAS 9' is never a clear match for 'SAS 8'.
+    """
+    clear = []
+    unresolved = []
+    fuzzy = RELATIECODES_INDEX.fuzzy
+    for name in names:
+        candidates = [match for match in fuzzy.candidates(name) if match.score >= REVIEW_MIN_SCORE]
+        best = candidates[0] if candidates else None
+        runner_up = candidates[1].score if len(candidates) > 1 else 0.0
+        if (best is not None and best.score >= AUTO_ACCEPT_SCORE and best.score - runner_up >= AUTO_ACCEPT_MARGIN
+                and digit_tokens(name) == digit_tokens(best.name)):
+            clear.append((name, candidates))
+        else:
+            unresolved.append((name, candidates))
+    return clear, unresolved
+
+
+def write_fuzzy_matches(clear, folder):
+    """
+    Writes the clear fuzzy matches that were used without a review to fuzzy_matches.csv in folder, so they can
+    be checked and added to the reference file by hand.
+    """
+    if not clear or not folder:
+        return None
+    matches_file = os.path.join(folder, "fuzzy_matches.csv")
+    pd.DataFrame({
+        'Name': [name for name, _ in clear],
+        'Matched name': [candidates[0].name for _, candidates in clear],
+        'Relatiecode': [candidates[0].code for _, candidates in clear],
+        'Score': [round(candidates[0].score, 2) for _, candidates in clear],
+    }).to_csv(matches_file, sep=';', index=False, encoding='utf-8')
+    log_message(f"Warning: {len(clear)} names got the code of a fuzzy match for this conversion only, "
+                f"see {matches_file}")
+    return matches_file
+
+
+def resolve_codes(kind, items):
+    """
+    Gets the missing codes of a kind for a list of (name, [FuzzyMatch]): all at once through the code review, or
+    one by one through the code prompt. Returns a dict name -> code for the names that got a code.
+    """
+    if not items:
+        return {}
+    if CODE_REVIEW is not None:
+        return {name: code for name, code in CODE_REVIEW(kind, items).items() if code}
+    codes = {}
+    for i, (name, _) in enumerate(items, start=1):
+        code = ask_code(kind, name, i, len(items))
+        if code:
+            codes[name] = code
+    return codes
+
+
+def parse_code_paste(text, names, start=0):
+    """
+    Reads codes pasted from a spreadsheet. Lines with a name and a code (tab or semicolon separated) are matched
+    by name, compared as clean_text without case, lines with only a code fill the names in order from position
+    start. Returns a dict name -> code and the lines that were not used: header rows and pairs of an unknown name.
+    """
+    codes = {}
+    unmatched = []
+    position = start
+    known = {paste_key(name): name for name in names}
+    for line in text.splitlines():
+        fields = [field.strip() for field in line.replace(";", "\t").split("\t")]
+        fields = [field for field in fields if field]
+        if not fields:
+            continue
+        if all(field.casefold() in PASTE_HEADERS for field in fields):
+            unmatched.append(line.strip())
+        elif len(fields) == 1:
+            if position < len(names):
+                codes[names[position]] = fields[0]
+                position += 1
+            else:
+                unmatched.append(line.strip())
+        elif paste_key(fields[0]) in known:
+            codes[known[paste_key(fields[0])]] = fields[1]
+        else:
+            unmatched.append(line.strip())
+    return codes, unmatched
+
+
+def paste_key(name):
+    """The form pasted names are matched by, 'bedrijf y ' matches 'Bedrijf Y'."""
+    return clean_text(str(name)).casefold()
+
+
+def check_missing_relatiecodes(merged_df, name_column, report_folder=None):
+    """
+    General function to check missing 'Relatiecodes' for any DataFrame.
+    Handles both Billit and Erelonen cases.
+    Returns a copy of merged_df with the entered 'Relatiecodes' filled in.
+    Only reviewed or entered codes are stored. Without a code review, clear fuzzy matches are used for this
+    conversion only and listed in fuzzy_matches.csv in report_folder, unless missing codes stop the conversion.
+    """
+    # Normalize names
+    merged_df = merged_df.copy()
+    merged_df['cleaned_name'] = NAME_CACHE.normalize_series(merged_df[name_column].astype(str))
+
+    # Find rows with missing Relatiecode
+    missing_codes = merged_df['Relatiecode'].isnull()
+
+    if missing_codes.any():
+        # Get unique missing names, names already known under their cleaned form need no prompt
+        missing_codes_list = RELATIECODES_INDEX.missing(merged_df.loc[missing_codes, 'cleaned_name'])
+
+        clear, unresolved = match_relatiecodes(missing_codes_list)
+        unreviewed = {}
+        if CODE_REVIEW is not None or not uses_fuzzy_matches():
+            # Clear matches are only proposed, the review screen shows them prefilled. Under the fail policy
+            # they stop the conversion like any other unknown name.
+            codes = resolve_codes("Relatiecode", clear + unresolved)
+        else:
+            codes = resolve_codes("Relatiecode", unresolved)
+            unreviewed = {name: candidates[0].code for name, candidates in clear}
+            write_fuzzy_matches(clear, report_folder)
+
+        # Add the reviewed and entered codes to the index and the reference store in one write
+        RELATIECODES_INDEX.add_many(codes)
+
+        missing_names = merged_df.loc[missing_codes, 'cleaned_name']
+        merged_df.loc[missing_codes, 'Relatiecode'] = RELATIECODES_INDEX.lookup(missing_names).fillna(
+            missing_names.map(unreviewed))
+
+        log_message("233: All missing Relatiecodes have been handled.")
+
+    report_progress("relatiecodes", len(merged_df))
+    return merged_df
+
+
+def read_excel_file(path, columns=None, **kwargs):
+    """Reads an input workbook through the readers module, parsing only the given columns, and logs the timing."""
+    df, timing = readers.read_excel(path, columns, **kwargs)
+    log_message(f"Info: {timing}")
+    return df
+
+
+def check_column_names(df, expected_columns):
+    """Checks if the DataFrame has the expected columns. Returns only missing columns."""
+    actual_columns = set(df.columns.str.strip())
+    expected_columns = set(expected_columns)
+    missing_columns = expected_columns - actual_columns
+    return missing_columns
+
+
+def ensure_save_folder_exists(save_folder):
+    if not os.path.exists(save_folder):
+        os.makedirs(save_folder)
+
+
+def validate_reference_file(validator=None):
+    """
+    Validates the reference file:
+    - Ensures the reference file contains exactly 'Name' and 'Relatiecode' columns.
+    - Ensures that one unique name has only one 'Relatiecode', comparing names as clean_text normalizes them.
+    - Allows one 'Relatiecode' to be assigned to multiple names.
+    The codes per name are kept by RELATIECODES_VALIDATOR, so only rows added or edited since the last
+    validation are checked again.
+    """
+    validator = validator or RELATIECODES_VALIDATOR
+    reference_df = validator.reference_file.frame()
+
+    # Check if the reference file has the correct columns
+    expected_columns = {'Name', 'Relatiecode'}
+    actual_columns = set(reference_df.columns.str.strip())  # Strip any leading/trailing spaces from column names
+    missing_columns = expected_columns - actual_columns
+
+    if missing_columns:
+        raise ValueError(f"Reference file must contain the following columns: {expected_columns}. "
+                         f"Missing columns: {missing_columns}")
+
+    # Check for duplicate names with different 'Relatiecode'
+    inconsistent_names = validator.conflicts()
+
+    if inconsistent_names:
+        raise ValueError(f"Duplicate 'Relatiecode' entries found for names: {inconsistent_names}")
+
+    # Since multiple names sharing the same 'Relatiecode' is allowed, no need to check that.
+
+    # If no inconsistencies found
+    log_message("300: Reference file is valid. No duplicate 'Relatiecode' entries found for the same name.")
+
+
+def clean_and_normalize_dataframe(input_df, name_column):
+    input_df['cleaned_name'] = NAME_CACHE.normalize_series(input_df[input_df.columns[name_column]])
+    return input_df
+
+
+def merge_dataframes(input_df, name_column):
+    # Clean and normalize the data
+    merged_df = clean_and_normalize_dataframe(input_df, name_column)
+
+    # Look up the 'Relatiecode' for every 'cleaned_name' in the relatiecode index
+    merged_df['Relatiecode'] = RELATIECODES_INDEX.lookup(merged_df['cleaned_name'])
+
+    return merged_df
+
+
+BTW_EXCEPTION = "BTW ratio matches no rate."
+
+# Columns the conversion adds to the input rows for its own use, they are not written to the reports
+HELPER_COLUMNS = ['cleaned_name']
+
+
+def reject_rows(rejects, df, mask, reason, details=None):
+    """
+    Moves the rows selected by mask into the rejects list and returns the remaining rows.
+    details are extra columns for the rejected rows, on the same index.
+    df keeps the index of the input file, so index + 2 is the row of the rejected line in the input.
+    """
+    if mask.any():
+        rejected = df[mask].copy()
+        if details is not None:
+            rejected = rejected.join(details)
+        rejected.insert(0, "Error", reason)
+        rejected.insert(0, "Row", rejected.index + 2)
+        rejects.append(rejected)
+    return df[~mask]
+
+
+def reject_btw_exceptions(rejects, df, tebetalen, basisbedrag):
+    """
+    Classifies the BTW of all rows at once. Rows whose ratio matches no rate are rejected with the details of the
+    BTW exception report. Returns the remaining rows and their btwcodes.
+    """
+    btw = classify_btw(tebetalen, basisbedrag)
+    unmatched = ~btw['matched']
+    details = btw_exception_details(tebetalen[unmatched], basisbedrag[unmatched]) if unmatched.any() else None
+    df = reject_rows(rejects, df, unmatched, BTW_EXCEPTION, details)
+    return df, btw.loc[df.index, 'btwcode']
+
+
+def load_btw_rates():
+    """
+    Reads the rate table from BTW_RATES_FILE when it exists, otherwise the built-in rates are used.
+    Raises ConfigurationError when the file has no Rate and Code columns, a rate or code that is not a number or
+    the same rate twice; the rates in use are then left unchanged.
+    """
+    path = BTW_RATES_FILE
+    if not os.path.exists(path):
+        return
+    try:
+        rates_df = pd.read_csv(path, delimiter=';', encoding='utf-8', dtype=str)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ConfigurationError(f"{path} cannot be read: {e}") from e
+    rates_df.columns = rates_df.columns.str.strip()
+    missing_columns = {'Rate', 'Code'} - set(rates_df.columns)
+    if missing_columns:
+        raise ConfigurationError(f"{path} must contain the columns Rate and Code, missing {sorted(missing_columns)}")
+
+    rates = pd.to_numeric(rates_df['Rate'].str.strip().str.replace(',', '.'), errors='coerce')
+    codes = pd.to_numeric(rates_df['Code'].str.strip(), errors='coerce')
+    # The header is row 1 of the file
+    problems = [("a rate that is not a number", rates.isna()), ("a code that is not a number", codes.isna()),
+                ("a rate that is listed twice", rates.notna() & rates.duplicated(keep=False))]
+    for problem, invalid in problems:
+        if invalid.any():
+            raise ConfigurationError(f"{path} has {problem} in row(s) {(rates_df.index[invalid] + 2).tolist()}")
+    set_btw_rates({round(rate / 100, 4): int(code) for rate, code in zip(rates, codes)})
+
+
+def concat_rejects(rejects):
+    """Combines the collected rejected rows into a single DataFrame."""
+    if not rejects:
+        return pd.DataFrame(columns=["Row", "Error"])
+    return pd.concat(rejects)
+
+
+def save_rejects(rejects_df, conversion_folder):
+    """
+    Writes the rejected rows of a conversion next to the converted file.
+    Rows with a BTW ratio that matches no rate go to their own report, btw_exceptions.csv.
+    """
+    if rejects_df is None or rejects_df.empty:
+        return
+    rejects_df = rejects_df.drop(columns=HELPER_COLUMNS, errors='ignore')
+    btw_exceptions = rejects_df["Error"] == BTW_EXCEPTION
+    if btw_exceptions.any():
+        exceptions_file = os.path.join(conversion_folder, "btw_exceptions.csv")
+        rejects_df[btw_exceptions].to_csv(exceptions_file, sep=';', index=False, encoding='utf-8')
+        log_message(f"Warning: {int(btw_exceptions.sum())} rows have a BTW ratio that matches no rate, "
+                    f"see {exceptions_file}")
+        # Only the detail columns of the BTW exceptions are dropped, an empty input column can be the reason
+        rejects_df = rejects_df[~btw_exceptions].drop(columns=BTW_DETAIL_COLUMNS, errors='ignore')
+        if rejects_df.empty:
+            return
+    rejects_file = os.path.join(conversion_folder, "rejected_rows.csv")
+    rejects_df.to_csv(rejects_file, sep=';', index=False, encoding='utf-8')
+    log_message(f"521: Warning: {len(rejects_df)} rows could not be converted, see {rejects_file}")
+
+
+def to_amount(column):
+    """Converts an amount column to absolute numbers, non-numeric values become NaN."""
+    return pd.to_numeric(column, errors='coerce').abs()
+
+
+def create_frame_from_excel_Billit(prepared_df, conversion_folder):
+    """
+    Converts the prepared Billit invoices and creditnota's at once.
+    Returns the converted DataFrame in the DOCUMENT_COLUMNS layout and a DataFrame with the rejected rows.
+    """
+    try:
+        missing_columns = check_column_names(prepared_df, EXPECTED_COLUMNS_BILLIT)
+        if missing_columns:
+            log_message(f"537: Missing prepared_df columns: {missing_columns}")
+            return None, None
+    except Exception as e:
+        log_message(f"540: Error reading the Excel file: {e}")
+        return None, None
+
+    rejects = []
+
+    # Rows without Order nummer are skipped and written to a separate file
+    order_nummer = prepared_df["Order nummer"]
+    missing_order = order_nummer.isna() | (order_nummer.astype(str).str.strip() == "")
+    if missing_order.any():
+        if "Factuurnr" in prepared_df.columns:
+            factuurnrs = prepared_df.loc[missing_order, "Factuurnr"]
+        else:
+            factuurnrs = "Row " + (prepared_df.index[missing_order] + 2).astype(str)
+        missing_order_nummers_file = os.path.join(conversion_folder, "missing_order_nummers.txt")
+        with open(missing_order_nummers_file, "w") as f:
+            f.writelines(f"Missing Order nummer for factuurnr: {factuurnr}\n" for factuurnr in factuurnrs)
+    df = prepared_df[~missing_order]
+
+    # Split Order nummer into dagboek, boekjaar and nummer
+    order_nummer = df["Order nummer"].astype(str)
+    dash_count = order_nummer.str.count("-")
+    df = reject_rows(rejects, df, (dash_count != 0) & (dash_count != 2),
+                     "Order nummer does not split into dagboek-boekjaar-nummer.")
+    order_nummer = order_nummer[df.index]
+    nummer_parts = order_nummer.str.split("-", expand=True).reindex(columns=range(3))
+    nummer_parts.loc[dash_count[df.index] == 0] = None
+    dagboek, boekjaar, nummer = nummer_parts[0], nummer_parts[1], nummer_parts[2]
+
+    # Creditnota's go to dagboek CN with code C
+    creditnota = dagboek == "CN1"
+    dagboek = dagboek.mask(creditnota, "CN")
+    factuurcode = pd.Series("F", index=df.index).mask(creditnota, "C")
+
+    # Handle dates
+    datum = pd.to_datetime(df["Datum"], errors='coerce')
+    vervaldatum = pd.to_datetime(df["Vervaldag"], errors='coerce')
+    df = reject_rows(rejects, df, datum.isna() | vervaldatum.isna(), "Invalid dates in the row.")
+
+    tebetalen = to_amount(df["Totaal inclusief"])
+    basisbedrag = to_amount(df["Totaal exclusief"])
+    df, btwcode = reject_btw_exceptions(rejects, df, tebetalen, basisbedrag)
+
+    omschrijving = df["Betreft"] if "Betreft" in df.columns else ""
+
+    frame = build_document_frame(
+        boekjaar=boekjaar[df.index],
+        dagboek=dagboek[df.index],
+        nummer=nummer[df.index],
+        datum=datum[df.index],
+        relatiecode=df["Relatiecode"],
+        vervaldatum=vervaldatum[df.index],
+        tebetalen=tebetalen[df.index],
+        basisbedrag=basisbedrag[df.index],
+        omschrijving=omschrijving,
+        codefcbd=factuurcode[df.index],
+        btwcode=btwcode
+    )
+
+    report_progress("build", len(frame))
+    return frame, concat_rejects(rejects)
+
+
+def create_frame_from_excel_Erelonen(prepared_df):
+    """
+    Converts the Erelonen invoices of the DataFrame from prepare_erelonen_excel_file at once.
+    Returns the converted DataFrame in the DOCUMENT_COLUMNS layout and a DataFrame with the rejected rows.
+    """
+    global HIGHEST, LOWEST
+    missing_columns = check_column_names(prepared_df, EXPECTED_COLUMNS_ERELONEN)
+    if missing_columns:
+        log_message(f"604: Missing columns :{missing_columns}")
+        return None, None
+
+    df = prepared_df
+
+    rejects = []
+
+    # Only factuurnummers starting with "AF" are converted
+    factuurnr = df["Factuurnr"].astype(str)
+    df = df[factuurnr.str.startswith("AF")]
+    factuurnr = factuurnr[df.index]
+
+    datum = pd.to_datetime(df["Documentdatum"], errors='coerce')
+    vervaldatum = pd.to_datetime(df["Vervaldag"], errors='coerce')
+    df = reject_rows(rejects, df, datum.isna() | vervaldatum.isna(), "Invalid dates in the row.")
+
+    # Split factuurnr into dagboek and factuurnummer
+    factuurnr = factuurnr[df.index]
+    df = reject_rows(rejects, df, factuurnr.str.count("/") != 1, "Factuurnr does not split into dagboek/nummer.")
+    df = reject_rows(rejects, df, ~df["Relatiecode"].map(lambda code: isinstance(code, str)),
+                     "Missing Relatiecode.")
+    tebetalen = to_amount(df["Totaal brutto"])
+    basisbedrag = to_amount(df["Totaal netto"])
+    df, btwcode = reject_btw_exceptions(rejects, df, tebetalen, basisbedrag)
+
+    nummer_parts = factuurnr[df.index].str.split("/", expand=True).reindex(columns=range(2))
+    dagboek = nummer_parts[0].replace({"AF1": "VK2", "AF2": "VK3"})
+    factuurnummer = nummer_parts[1].astype(str).str[2:]
+    datum = datum[df.index]
+
+    if not df.empty:
+        HIGHEST = factuurnummer.max()
+        LOWEST = factuurnummer.min()
+
+    # Grootboekrekening follows from the first letter of the Relatiecode
+    rekening = df["Relatiecode"].astype(str).str[:1].map({
+        "H": "700010",
+        "D": "700020",
+        "L": "700030",
+        "G": "700040",
+        "R": "700050"
+    }).fillna("NA")
+
+    frame = build_document_frame(
+        boekjaar=datum.dt.year,
+        dagboek=dagboek,
+        nummer=factuurnummer,
+        datum=datum,
+        relatiecode=df["Relatiecode"],
+        vervaldatum=vervaldatum[df.index],
+        tebetalen=tebetalen[df.index],
+        basisbedrag=basisbedrag[df.index],
+        omschrijving="",
+        rekening=rekening,
+        btwcode=btwcode
+    )
+    # Keep the input index, so converted rows can still be traced back to their row in the export
+    frame.index = df.index
+
+    report_progress("build", len(frame))
+    return frame, concat_rejects(rejects)
+
+
+def create_frame_from_excel_Rappels(file_path):
+    """
+    Reads and converts the Rappels reminders at once.
+    Returns the converted DataFrame in the DOCUMENT_COLUMNS layout and a DataFrame with the rejected rows.
+    """
+    possible_factuurnummer_columns = ["Factuurnummer", "Factuurnr"]
+
+    try:
+        df = read_excel_file(file_path, READ_COLUMNS_RAPPELS)
+        report_progress("read", len(df))
+        missing_columns = check_column_names(df, EXPECTED_COLUMNS_RAPPELS)
+
+        if missing_columns:
+            log_message(f"670: Missing column(s): {missing_columns}")
+            return None, None
+
+        factuurnummer_col = next((col for col in possible_factuurnummer_columns if col in df.columns), None)
+        if not factuurnummer_col:
+            log_message("675: Missing 'Factuurnummer' or 'Factuurnr' column.")
+            return None, None
+
+    except Exception as e:
+        log_message(f"679: Error reading the Excel file: {e}")
+        return None, None
+
+    rejects = []
+    read_rows = len(df)
+
+    df = reject_rows(rejects, df, ~df[factuurnummer_col].map(lambda nr: isinstance(nr, str)), "Missing factuurnr.")
+    datum = pd.to_datetime(df["Documentdatum"], errors='coerce')
+    df = reject_rows(rejects, df, datum.isna(), "Invalid date in the row.")
+    tebetalen = to_amount(df["Totaal brutto"])
+    basisbedrag = to_amount(df["Totaal netto"])
+    df, btwcode = reject_btw_exceptions(rejects, df, tebetalen, basisbedrag)
+    datum = datum[df.index]
+
+    frame = build_document_frame(
+        boekjaar=datum.dt.year,
+        dagboek="VK4",
+        nummer=df[factuurnummer_col].str[4:],
+        datum=datum,
+        relatiecode=df["Relatiecode"],
+        vervaldatum=datum + pd.Timedelta(days=15),
+        tebetalen=tebetalen[df.index],
+        basisbedrag=basisbedrag[df.index],
+        omschrijving="",
+        btwcode=btwcode
+    )
+
+    log_message(f"Info: {len(frame)} of {read_rows} reminders converted.")
+    report_progress("build", len(frame))
+    return frame, concat_rejects(rejects)
+
+
+def initialize_grootboekrekeningen_file():
+    """Initializes the grootboekrekeningen.csv file if it doesn't exist."""
+    if not os.path.exists(GROOTBOEKREKENINGEN_FILE):
+        with open(GROOTBOEKREKENINGEN_FILE, mode='w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(['Code', 'Grootboekrekening'])  # Add header to the CSV file
+        log_message(f"{GROOTBOEKREKENINGEN_FILE} file created with header.")
+
+
+def load_and_merge_file(input_path, type):
+    """
+    Helper function to load, clean, and look up the Relatiecodes of the input file in RELATIECODES_INDEX.
+    This function is shared between Billit and Erelonen file preparation.
+    """
+    try:
+        # Validate the reference file before the input is read, so an inconsistent file fails fast
+        validate_reference_file()
+
+        # Load the input DataFrame
+        if type == "erelonen":
+            input_df = read_excel_file(input_path, header=1)
+            report_progress("read", len(input_df))
+            merged_df = merge_dataframes(input_df, 0)
+
+        elif type == "billit":
+            input_df = read_excel_file(input_path, READ_COLUMNS_BILLIT)
+            report_progress("read", len(input_df))
+            merged_df = merge_dataframes(input_df, input_df.columns.get_loc("Bedrijf"))
+
+        report_progress("lookup", len(merged_df))
+
+        return merged_df
+
+    except Exception as e:
+        log_message(f"537: Error loading or merging data: {e}")
+        return None
+
+
+def erelonen_period_range(month, year, end_month=None, end_year=None):
+    """
+    Returns the first and last month of an Erelonen conversion as year * 12 + month - 1.
+    Without end_month and end_year only month/year is converted, a missing one of the two is taken from the start.
+    """
+    first = year * 12 + month - 1
+    if end_month is None and end_year is None:
+        return first, first
+    last = (end_year or year) * 12 + (end_month or month) - 1
+    return first, max(first, last)
+
+
+def prepare_erelonen_excel_file(input_path, month, year, save_folder, end_month=None, end_year=None):
+    """
+    Reads the Erelonen export once and returns the rows of the months from month/year up to and including
+    end_month/end_year, see erelonen_period_range.
+    """
+    try:
+        ensure_save_folder_exists(save_folder)
+
+        # Check if input path exists
+        if not input_path or not os.path.exists(input_path):
+            log_message("547: Please select a valid input file.")
+            return None
+
+        # Validate the reference file before the input is read, so an inconsistent file fails fast
+        validate_reference_file()
+
+        # Load the Excel file (skip the first two rows to get headers from the third row)
+        df = read_excel_file(input_path, READ_COLUMNS_ERELONEN_EXPORT, skiprows=2)
+        report_progress("read", len(df))
+        if df is None or df.empty:
+            log_message("553: The loaded DataFrame is empty.")
+            return None
+        # Count the two skipped rows, so index + 2 is the row in the export like for the other inputs
+        df.index += 2
+
+        # Rename columns for clarity (adjust according to the actual input data structure)
+        df.rename(columns={
+            'Unnamed: 0': 'Gebouw',
+            'Unnamed: 1': 'Factuurnr',
+            'Unnamed: 2': 'Totaal brutto',
+            'Unnamed: 3': 'Totaal netto',
+            'Unnamed: 4': 'Totaal BTW',
+            'Unnamed: 5': 'Vervaldag',
+            'Unnamed: 6': 'Betaald',
+            'Unnamed: 7': 'Documentnummer',
+            'Unnamed: 8': 'Documentdatum'
+        }, inplace=True)
+
+        log_message(f"569: Columns in merged_df: {list(df.columns)}")
+
+        # Look up the 'Relatiecode' for every 'Gebouw' in the relatiecode index
+        merged_df = df.assign(Relatiecode=RELATIECODES_INDEX.lookup(df['Gebouw']))
+        report_progress("lookup", len(merged_df))
+
+        # Check if the "Relatiecode" column exists after the merge
+        if 'Relatiecode' not in merged_df.columns:
+            log_message("576: Error: 'Relatiecode' column is missing after merging with the reference data.")
+            return None
+
+        # Filter rows where 'Factuurnr' starts with 'AF'
+        df_filtered = merged_df[merged_df['Factuurnr'].str.startswith('AF', na=False)]
+
+        df_filtered = check_missing_relatiecodes(df_filtered, "Gebouw", save_folder)
+
+        # Convert 'Documentdatum' to datetime and log any invalid entries
+        df_filtered['Documentdatum'] = pd.to_datetime(df_filtered['Documentdatum'], errors='coerce')
+
+        # Log and filter out rows with invalid 'Documentdatum' values (NaT after conversion)
+        invalid_dates = df_filtered[df_filtered['Documentdatum'].isna()]
+        if not invalid_dates.empty:
+            log_message(
+                f"590: Warning: Found invalid dates in the following rows:\n{invalid_dates[['Factuurnr', 'Documentdatum']]}")
+
+        # Keep only rows with valid dates
+        df_filtered = df_filtered[df_filtered['Documentdatum'].notna()]
+
+        # Filter by the specified period
+        first, last = erelonen_period_range(month, year, end_month, end_year)
+        period = df_filtered['Documentdatum'].dt.year * 12 + df_filtered['Documentdatum'].dt.month - 1
+        df_filtered = df_filtered[(period >= first) & (period <= last)]
+
+        # Reordering columns: Move 'Relatiecode' to the second position if it exists
+        cols = df_filtered.columns.tolist()
+        if 'Relatiecode' in cols:
+            cols.insert(1, cols.pop(cols.index('Relatiecode')))
+            df_filtered = df_filtered[cols]
+
+        # Keep the filtered DataFrame as a debug file if requested
+        save_intermediate_file(df_filtered.reset_index(drop=True), save_folder, "erelonen")
+
+        return df_filtered
+
+    except Exception as e:
+        log_message(f"615: An error occurred: {e}")
+        return None
+
+
+def prepare_billit_excel_file(input_path, save_folder):
+    try:
+        ensure_save_folder_exists(save_folder)
+
+        # Check if input path exists
+        if not input_path or not os.path.exists(input_path):
+            log_message("625: Please select a valid input file.")
+            return None
+
+        # Load and merge data using helper function
+        merged_df = load_and_merge_file(input_path, "billit")
+        if merged_df is None:
+            return None
+
+        log_message(f"633: Columns in merged_df: {list(merged_df.columns)}")
+
+        # Filter rows based on 'Order nummer' for facturen (VK-) and creditnota's (CN1-)
+        df_facturen = merged_df[merged_df['Order nummer'].str.startswith('VK-', na=False)]
+        df_creditnota = merged_df[merged_df['Order nummer'].str.startswith('CN1-', na=False)]
+
+        # Combine both facturen and creditnota's into a single DataFrame, keeping the rows of the input file
+        df_filtered = pd.concat([df_facturen, df_creditnota])
+
+        # Handle missing Relatiecodes for the combined DataFrame
+        df_filtered = check_missing_relatiecodes(df_filtered, "Bedrijf", save_folder)
+
+        # Convert 'Datum' to datetime format
+        df_filtered['Datum'] = pd.to_datetime(df_filtered['Datum'], errors='coerce')
+
+        # Keep the prepared DataFrame as a debug file if requested
+        save_intermediate_file(df_filtered.reset_index(drop=True), save_folder, "prepared_billit_file")
+
+        return df_filtered
+
+    except Exception as e:
+        log_message(f"656: An error occurred: {e}")
+        return None
+
+
+def set_intermediate_format(file_format):
+    """Keeps the prepared DataFrames as debug files in the given format, None does not write them."""
+    global INTERMEDIATE_FORMAT
+    INTERMEDIATE_FORMAT = file_format
+
+
+def save_intermediate_file(df, save_folder, name):
+    """Writes a prepared DataFrame to save_folder in INTERMEDIATE_FORMAT, nothing when no format is set."""
+    if INTERMEDIATE_FORMAT is None:
+        return None
+
+    file_format = INTERMEDIATE_FORMAT
+    output_file_path = os.path.join(save_folder, f"{name}.{file_format}")
+    try:
+        if file_format == "parquet":
+            df.to_parquet(output_file_path, index=False)
+        elif file_format == "feather":
+            df.to_feather(output_file_path)
+        elif file_format == "csv":
+            df.to_csv(output_file_path, sep=';', index=False, encoding='utf-8')
+        else:
+            df.to_excel(output_file_path, index=False)
+    except ImportError as e:
+        # Parquet and Feather need pyarrow, fall back to CSV without it
+        log_message(f"Warning: Cannot write {file_format} ({e}), writing CSV instead.")
+        output_file_path = os.path.join(save_folder, f"{name}.csv")
+        df.to_csv(output_file_path, sep=';', index=False, encoding='utf-8')
+
+    log_message(f"611: Data saved to {output_file_path}")
+    return output_file_path
+
+
+def set_output_format(file_format):
+    """Chooses the format of the converted file: 'xlsx' or 'csv'."""
+    global OUTPUT_FORMAT
+    OUTPUT_FORMAT = file_format
+
+
+def set_incremental(enabled):
+    """Turns incremental Billit conversions on or off."""
+    global INCREMENTAL
+    INCREMENTAL = enabled
+
+
+def set_save_name_cache(enabled):
+    """Turns writing NAME_CACHE to its file at the end of a conversion on or off."""
+    global SAVE_NAME_CACHE
+    SAVE_NAME_CACHE = enabled
+
+
+def select_new_documents(df):
+    """
+    Keeps the converted rows that are not in the Billit ledger yet or that changed since they were exported.
+    Returns the remaining rows and their ledger entries, which are recorded once the file is saved.
+    """
+    entries = BILLIT_LEDGER.entries(df)
+    new = BILLIT_LEDGER.new_or_changed(entries)
+    log_message(f"Incremental: {int(new.sum())} of {len(df)} invoices are new or changed.")
+    return df[new], entries[new]
+
+
+def save_output_file(df, folder_path, add=""):
+    """Saves the converted DataFrame in OUTPUT_FORMAT."""
+    if OUTPUT_FORMAT == "csv":
+        return save_csv_file(df, folder_path, add)
+    return save_excel_file(df, folder_path, add)
+
+
+def output_kind(path):
+    """'CSV' or 'Excel', after the extension of a saved output file."""
+    return "CSV" if path.lower().endswith(".csv") else "Excel"
+
+
+def save_csv_file(df, folder_path, add=""):
+    nowtime = datetime.now().strftime("%H_%M")
+    filename = f"{nowtime + add}.csv"
+    full_path = os.path.join(folder_path, filename)
+    try:
+        saved_path = writers.write_csv(df, full_path)
+        report_progress("save", len(df))
+        log_message(f"CSV file saved at {saved_path}")
+        return saved_path
+    except Exception as e:
+        log_message(f"Error saving the CSV file: {e}")
+        return None
+
+
+def save_excel_file(df, folder_path, add=""):
+    nowtime = datetime.now().strftime("%H_%M")
+    filename = f"{nowtime + add}.xlsx"
+    full_path = os.path.join(folder_path, filename)
+    try:
+        saved_path = writers.write_excel(df, full_path)
+        report_progress("save", len(df))
+        log_message(f"678: Excel file saved at {saved_path}")
+        return saved_path
+    except Exception as e:
+        log_message(f"680: Error saving the Excel file: {e}")
+        return None
+
+
+def run_conversion(conversion_type, input_path, output_folder_path, month=None, year=None, end_month=None,
+                   end_year=None):
+    """
+    Runs one Billit, Erelonen or Rappels conversion and writes its output files to output_folder_path.
+    Month and year are only used by Erelonen, with end_month and end_year every month up to that one is converted
+    to its own file. Returns the path of the (last) converted Excel file, or None.
+    The time, rows and peak memory of every stage are logged and written to conversion_metrics.json.
+    """
+    global METRICS, NOTHING_TO_SAVE
+    CANCEL_EVENT.clear()
+    NOTHING_TO_SAVE = False
+    METRICS = ConversionMetrics(conversion_type, input_path).start()
+    saved_path = None
+    status = "failed"
+    try:
+        load_btw_rates()
+        saved_path = convert_input_file(conversion_type, input_path, output_folder_path, month, year, end_month,
+                                        end_year)
+        status = "ok" if saved_path or NOTHING_TO_SAVE else "failed"
+    except MissingCodeError as e:
+        # The fail policy stops this conversion, the caller goes on with the next file
+        log_message(f"Error: {e}, conversion stopped.")
+    except ConfigurationError as e:
+        log_message(f"Configuration error: {e}, conversion stopped.")
+    except Exception as e:
+        # Any other error fails this file only, like in batch.convert_job
+        log_message(f"Error converting {input_path}: {e}")
+    except ConversionCancelled:
+        status = "cancelled"
+        raise
+    finally:
+        finish_metrics(status, saved_path, output_folder_path)
+    return saved_path
+
+
+def conversion_ok():
+    """True when the last conversion succeeded, also when it had nothing new to save."""
+    return METRICS is not None and METRICS.status == "ok"
+
+
+def finish_metrics(status, saved_path, output_folder_path):
+    """Logs the stage summary of the conversion and writes the metrics file next to missing_values.txt."""
+    METRICS.finish(status, saved_path)
+    for line in METRICS.summary_lines():
+        log_message(line)
+    if os.path.isdir(output_folder_path):
+        try:
+            METRICS.write(output_folder_path)
+        except OSError as e:
+            log_message(f"Warning: Could not write the conversion metrics: {e}")
+
+
+def sort_by_factuurnummer(df):
+    """
+    Converts 'factuur (H)' to numbers without leading zeros and sorts on it, rows without a number go last.
+    Whole numbers stay integers when a number is missing, so they are not written as '12,0'.
+    """
+    if 'factuur (H)' not in df.columns:
+        return df
+    df = df.copy()
+    numbers = pd.to_numeric(df['factuur (H)'].astype(str).str.lstrip('0'), errors='coerce')
+    if (numbers.dropna() % 1 == 0).all():
+        numbers = numbers.astype('Int64')
+    df['factuur (H)'] = numbers
+    return df.sort_values(by='factuur (H)', kind='stable', na_position='last')
+
+
+def save_validated_output(df, output_folder_path, add):
+    """
+    Checks the required columns for empty cells and saves the converted file.
+    A file with empty cells is saved as 'withemptycells', so it is not imported by mistake.
+    Returns the saved path and whether the file can be imported, False for a 'withemptycells' file.
+    """
+    # Check for missing values in the specified columns
+    missing_values = check_missing_values_in_columns(df, output_folder_path)
+
+    # If no missing values were found in any of the relevant columns
+    if not missing_values:
+        saved_path = save_output_file(df, output_folder_path, add)
+        if saved_path:
+            log_message(f"727: Info: {output_kind(saved_path)} file saved without missing values at {saved_path}.")
+    else:
+        # Log a summary per column, every empty cell is listed in missing_values.txt
+        log_message(f"730: Warning: {missing_values.total} empty cells, see missing_values.txt.")
+        for line in missing_values.summary_lines():
+            log_message(f"733: {line}")
+
+        # Save the file with a different name to indicate missing cells
+        saved_path = save_output_file(df, output_folder_path, "withemptycells")
+        if saved_path:
+            log_message(f"737: Info: {output_kind(saved_path)} file saved with missing values at {saved_path}.")
+    return saved_path, not missing_values
+
+
+def save_billit_output(df, output_folder_path, ledger_entries=None):
+    """
+    Saves the converted Billit file. Only the invoices of an importable file are recorded in the ledger, the
+    invoices of a 'withemptycells' file are converted again by the next incremental run.
+    """
+    saved_path, importable = save_validated_output(df, output_folder_path, "billit")
+    if saved_path and ledger_entries is not None:
+        if importable:
+            BILLIT_LEDGER.record(ledger_entries)
+        else:
+            log_message("Info: The invoices of a file with empty cells are not recorded as exported.")
+    return saved_path
+
+
+def convert_erelonen_period(period_df, output_folder_path, several_periods, year, month):
+    """
+    Converts and saves the Erelonen invoices of one month. The file is named after its lowest factuurnummer, or
+    when a range of months is converted, after the month and its lowest and highest factuurnummer.
+    Returns the saved path and the rejected rows.
+    """
+    global HIGHEST, LOWEST
+    HIGHEST = LOWEST = None
+    converted_df, rejects_df = create_frame_from_excel_Erelonen(period_df)
+    if converted_df is None or converted_df.empty:
+        log_message(f"Warning: No Erelonen documents created for {month:02d}/{year}.")
+        return None, rejects_df
+
+    sorted_data = converted_df.sort_values(by='factuur (H)', na_position='last')
+    # Perform the check for missing rekeningnummers just before saving
+    sorted_data = check_missing_rekeningnummers(sorted_data, "relaties_code (H)")  # Assuming "Relatiecode" column has the names
+
+    # Rows that are left without a grootboekrekening are not converted, like rows without a Relatiecode
+    missing = sorted_data['boekhpl_reknr (D)'] == "NA"
+    if missing.any():
+        rejects = [rejects_df] if rejects_df is not None and not rejects_df.empty else []
+        unconverted = period_df.loc[sorted_data.index[missing]]
+        reject_rows(rejects, unconverted, pd.Series(True, index=unconverted.index), "Missing Grootboekrekening.")
+        rejects_df = concat_rejects(rejects)
+        sorted_data = sorted_data[~missing]
+        log_message(f"Warning: {int(missing.sum())} rows of {month:02d}/{year} have no Grootboekrekening and are "
+                    f"not converted, see rejected_rows.csv.")
+        if sorted_data.empty:
+            return None, rejects_df
+        LOWEST = sorted_data['factuur (H)'].min()
+        HIGHEST = sorted_data['factuur (H)'].max()
+
+    # Save the updated sorted_data to Excel after the missing rekeningnummers check
+    add = f"_{year}_{month:02d}_{LOWEST}-{HIGHEST}" if several_periods else str(LOWEST)
+    return save_output_file(sorted_data, output_folder_path, add), rejects_df
+
+
+def convert_input_file(conversion_type, input_path, output_folder_path, month=None, year=None, end_month=None,
+                       end_year=None):
+    """The conversion steps of run_conversion."""
+    global NOTHING_TO_SAVE
+    initialize_grootboekrekeningen_file()
+    ensure_save_folder_exists(output_folder_path)
+    saved_path = None
+
+    if conversion_type == "Billit":
+        # Prepare the Billit file, which loads and merges data
+        prepared_df = prepare_billit_excel_file(input_path, output_folder_path)
+        # Check if the DataFrame `prepared_df` is valid
+        if prepared_df is not None and not prepared_df.empty:
+            # Build the converted DataFrame straight from the prepared DataFrame
+            df, rejects_df = create_frame_from_excel_Billit(prepared_df, output_folder_path)
+            save_rejects(rejects_df, output_folder_path)
+            ledger_entries = None
+            if INCREMENTAL and df is not None:
+                df, ledger_entries = select_new_documents(df)
+            # Check if any documents were created
+            if df is not None and not df.empty:
+                df = sort_by_factuurnummer(df)
+
+                if not df.empty:
+                    saved_path = save_billit_output(df, output_folder_path, ledger_entries)
+                else:
+                    log_message("740: Warning: No data to save in Billit file.")
+            elif ledger_entries is not None and df is not None:
+                log_message("Info: No new or changed invoices since the last conversion, nothing to save.")
+                NOTHING_TO_SAVE = True
+            else:
+                log_message("742: Warning: No documents created for Billit conversion.")
+        else:
+            log_message("744: Warning: The prepared Billit DataFrame is empty.")
+
+    elif conversion_type == "Erelonen":
+
+        prepared_df = prepare_erelonen_excel_file(input_path, month, year, output_folder_path, end_month, end_year)
+
+        if prepared_df is not None:
+            first, last = erelonen_period_range(month, year, end_month, end_year)
+            dates = prepared_df['Documentdatum']
+            rejects = []
+            # The export is read and merged once, every month of the range gets its own file
+            for (period_year, period_month), period_df in prepared_df.groupby([dates.dt.year, dates.dt.month]):
+                period_path, rejects_df = convert_erelonen_period(period_df, output_folder_path, first != last,
+                                                                  period_year, period_month)
+                rejects.append(rejects_df)
+                saved_path = period_path or saved_path
+            save_rejects(concat_rejects([r for r in rejects if r is not None and not r.empty]), output_folder_path)
+            if prepared_df.empty:
+                log_message("Warning: No Erelonen invoices in the selected period.")
+
+    elif conversion_type == "Rappels":
+        converted_df, rejects_df = create_frame_from_excel_Rappels(input_path)
+        save_rejects(rejects_df, output_folder_path)
+        if converted_df is not None and not converted_df.empty:
+            converted_df = sort_by_factuurnummer(converted_df)
+            saved_path, _ = save_validated_output(converted_df, output_folder_path, "rappels")
+        else:
+            log_message("816: Warning: No documents created for Rappels conversion.")
+
+    else:
+        log_message(f"819: Unknown conversion type: {conversion_type}")
+        return None
+
+    if SAVE_NAME_CACHE:
+        NAME_CACHE.save()
+    log_message(f"752: Files saved to {output_folder_path}")
+    return saved_path
+
+
+def check_missing_rekeningnummers(df, name_column):
+    """
+    General function to check missing 'Grootboekrekeningen' for any DataFrame.
+    Handles Erelonen cases.
+    """
+    # Get grootboekrekeningen.csv from the reference cache, ensuring columns are treated as strings
+    grootboek_df = GROOTBOEKREKENINGEN.frame().copy()
+
+    # Ensure 'Code' column is always treated as a string and normalized
+    grootboek_df['Code'] = grootboek_df['Code'].str.strip().str.lower()  # Normalize 'Code' in CSV
+    df = df.copy()  # Make a copy of the dataframe to avoid modifying in place
+    cleaned_names = df[name_column].astype(str).str.strip().str.lower()  # Normalize the names
+
+    log_message(f"Checking missing rekeningen for: {cleaned_names.unique()}")  # Debugging
+
+    # Find rows where Grootboekrekening is "NA"
+    missing_rekeningen = cleaned_names[df['boekhpl_reknr (D)'] == "NA"]
+
+    if not missing_rekeningen.empty:
+        # Get unique missing names
+        missing_names_list = missing_rekeningen.unique().tolist()
+
+        # Use the rekeningen that already exist in grootboek_df
+        first_rows = grootboek_df.drop_duplicates(subset='Code')
+        known = dict(zip(first_rows['Code'], first_rows['Grootboekrekening']))
+        rekeningen = {name: known[name] for name in missing_names_list if name in known}
+        for cleaned_name, rekening in rekeningen.items():
+            log_message(f"Using existing grootboekrekening for {cleaned_name}: {rekening}")
+
+        # Ask the other rekeningen together
+        new_rekeningen = resolve_codes("Grootboekrekening",
+                                       [(name, []) for name in missing_names_list if name not in known])
+        rekeningen.update(new_rekeningen)
+
+        # Update the rekeningen in the DataFrame
+        missing = df['boekhpl_reknr (D)'] == "NA"
+        entered = cleaned_names[missing].map(rekeningen)
+        df.loc[missing, 'boekhpl_reknr (D)'] = entered.fillna("NA")
+
+        # Add only the new entries in one write, the existing rows are not rewritten
+        if new_rekeningen:
+            GROOTBOEKREKENINGEN.append(pd.DataFrame(list(new_rekeningen.items()),
+                                                    columns=['Code', 'Grootboekrekening']))
+
+    log_message("All missing rekeningnummers have been handled.")
+    report_progress("validate", len(df))
+
+    return df  # Return the updated DataFrame
+
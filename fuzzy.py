@@ -0,0 +1,100 @@
+import re
+
+from collections import Counter
+
+import unidecode
+
+# Legal forms that are written differently from export to export, they are left out of the comparison
+LEGAL_FORMS = {"bv", "bvba", "nv", "vzw", "cv", "cvba", "vof", "commv", "sprl", "srl", "sa", "asbl", "vme"}
+
+NGRAM_SIZE = 3
+MAX_CANDIDATES = 3
+SCORED_CANDIDATES = 20  # Candidates with the most shared n-grams that get an exact score
+COMMON_NGRAM_SHARE = 0.2  # n-grams in more than this share of the names are too common to select candidates
+
+
+def fuzzy_key(name):
+    """
+    Reduces a name to what matters for matching: ASCII, lowercase, letters and digits only, without legal forms.
+    Replacement characters from badly decoded files are dropped, so 'IMMOBILI�N' is close to 'Immobilien'.
+    """
+    text = unidecode.unidecode(str(name).replace("�", "")).lower()
+    tokens = re.sub(r"[^a-z0-9]+", " ", text).split()
+    return " ".join(token for token in tokens if token not in LEGAL_FORMS)
+
+
+def digit_tokens(name):
+    """
+    The numbers in a name without leading zeros. Names that differ only by a number ('SAS 8', 'SAS 9',
+    '(000449)', '(000450)') are different buildings with their own code.
+    """
+    return {token.lstrip("0") or "0" for token in re.findall(r"\d+", fuzzy_key(name))}
+
+
+def ngrams(key):
+    padded = f" {key} "
+    return {padded[i:i + NGRAM_SIZE] for i in range(max(1, len(padded) - NGRAM_SIZE + 1))}
+
+
+class FuzzyMatch:
+    """A reference name proposed for an unknown name, with its code and a score between 0 and 1."""
+
+    def __init__(self, name, code, score):
+        self.name = name
+        self.code = code
+        self.score = score
+
+    def __repr__(self):
+        return f"FuzzyMatch({self.name!r}, {self.code!r}, {self.score:.2f})"
+
+
+class FuzzyIndex:
+    """
+    Inverted n-gram index over the reference names.
+    Candidates are the names that share the most uncommon n-grams with the query; only those are scored with the
+    Dice coefficient of their n-gram sets, so a lookup does not compare against every reference name.
+    """
+
+    def __init__(self, names=(), codes=()):
+        self.names = []
+        self.codes = []
+        self.grams = []
+        self.postings = {}
+        for name, code in zip(names, codes):
+            self.add(name, code)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, code):
+        grams = ngrams(fuzzy_key(name))
+        position = len(self.names)
+        self.names.append(name)
+        self.codes.append(code)
+        self.grams.append(grams)
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(position)
+
+    def candidates(self, name, limit=MAX_CANDIDATES):
+        """Returns up to limit FuzzyMatches for name, best first."""
+        grams = ngrams(fuzzy_key(name))
+        common = max(1, int(len(self.names) * COMMON_NGRAM_SHARE))
+        shared = Counter()
+        for gram in grams:
+            postings = self.postings.get(gram, ())
+            if len(postings) <= common:
+                shared.update(postings)
+        if not shared:
+            # Only common n-grams, count them all
+            for gram in grams:
+                shared.update(self.postings.get(gram, ()))
+
+        matches = {}
+        for position, _ in shared.most_common(SCORED_CANDIDATES):
+            other = self.grams[position]
+            score = 2 * len(grams & other) / (len(grams) + len(other))
+            code = self.codes[position]
+            # The same code can be known under several names, keep its best score
+            if code not in matches or score > matches[code].score:
+                matches[code] = FuzzyMatch(self.names[position], code, score)
+        return sorted(matches.values(), key=lambda match: match.score, reverse=True)[:limit]
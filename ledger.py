@@ -0,0 +1,62 @@
+import os
+
+import pandas as pd
+
+LEDGER_COLUMNS = ["Dagboek", "Boekjaar", "Nummer", "Hash"]
+KEY_COLUMNS = {"Dagboek": "dagboek_dagboek (H)", "Boekjaar": "boekjaar_boekjaar (H)", "Nummer": "factuur (H)"}
+
+
+def read_ledger(path):
+    """Reads the ledger file. An invoice that was exported again has several lines, the last one counts."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=LEDGER_COLUMNS)
+    ledger_df = pd.read_csv(path, delimiter=';', encoding='utf-8', dtype=str, keep_default_na=False)
+    return ledger_df.drop_duplicates(subset=list(KEY_COLUMNS), keep='last').reset_index(drop=True)
+
+
+def ledger_keys(df):
+    """Joins dagboek, boekjaar and nummer into one key per row."""
+    return df["Dagboek"] + "|" + df["Boekjaar"] + "|" + df["Nummer"]
+
+
+def has_key(entries):
+    keys = entries[list(KEY_COLUMNS)]
+    # astype(str) leaves missing values as NaN or writes them as text, depending on the dtype and pandas version
+    return ~(keys.isna() | keys.isin(["None", "nan", "NaN", "<NA>", ""])).any(axis=1)
+
+
+class ConversionLedger:
+    """
+    Remembers which invoices were exported, by (dagboek, boekjaar, nummer) and a hash of the converted row.
+    The ledger is a ReferenceFile, so it is cached like the other reference CSVs and new entries are appended.
+    """
+
+    def __init__(self, reference_file):
+        self.reference_file = reference_file
+
+    def entries(self, frame):
+        """Returns the ledger entries of the rows of a converted DataFrame, with the index of frame."""
+        entries = pd.DataFrame({name: frame[column].astype(str) for name, column in KEY_COLUMNS.items()},
+                               index=frame.index)
+        entries["Hash"] = pd.util.hash_pandas_object(frame.astype(str), index=False).astype(str)
+        return entries
+
+    def new_or_changed(self, entries):
+        """
+        Boolean Series that is True for entries that are not in the ledger or whose hash changed.
+        Rows without a complete key cannot be tracked and always count as new.
+        """
+        ledger_df = self.reference_file.frame()
+        keys = ledger_keys(ledger_df)
+        known = pd.Series(ledger_df["Hash"].to_numpy(), index=keys)
+        known = known[~keys.duplicated(keep='last').to_numpy()]  # Entries appended since the last read
+        return ~has_key(entries) | ledger_keys(entries).map(known).ne(entries["Hash"])
+
+    def record(self, entries):
+        """Adds exported entries to the ledger file."""
+        entries = entries[has_key(entries)]
+        if entries.empty:
+            return
+        if not os.path.exists(self.reference_file.path):
+            self.reference_file.save(pd.DataFrame(columns=LEDGER_COLUMNS))
+        self.reference_file.append(entries[LEDGER_COLUMNS].reset_index(drop=True))
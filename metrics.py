@@ -0,0 +1,151 @@
+import json
+import os
+import sys
+import time
+
+from datetime import datetime
+
+METRICS_FILE = "conversion_metrics.json"
+
+
+def peak_memory():
+    """Returns the peak resident memory of the process in bytes, None when the platform does not report it."""
+    try:
+        import resource
+    except ImportError:
+        return windows_peak_memory()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports kilobytes, macOS bytes
+
+
+def windows_peak_memory():
+    try:
+        import ctypes
+        from ctypes import wintypes
+    except ImportError:
+        return None
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    try:
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.PeakWorkingSetSize
+    except (AttributeError, OSError):
+        return None
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class StageMetrics:
+    """
+    Wall time, rows and memory of one stage of a conversion.
+    peak_memory is the peak memory of the process at the end of the stage, memory_growth how much the stage raised
+    it. Both are None when the platform does not report memory.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.seconds = 0.0
+        self.rows = 0
+        self.peak_memory = None
+        self.memory_growth = None
+
+    def to_dict(self):
+        return {"stage": self.stage, "seconds": round(self.seconds, 4), "rows": self.rows,
+                "peak_memory": self.peak_memory, "memory_growth": self.memory_growth}
+
+    def __str__(self):
+        text = f"{self.stage}: {self.seconds:.2f} s, {self.rows} rows"
+        if self.peak_memory is not None:
+            text += f", peak {format_bytes(self.peak_memory)} (+{format_bytes(self.memory_growth)})"
+        return text
+
+
+class ConversionMetrics:
+    """
+    Collects the stage metrics of one conversion.
+    A stage runs from the previous record() to the next one, so the stage reports of the pipeline are enough to
+    time everything in between. A stage reported more than once, e.g. once per month of an Erelonen range, adds
+    up its time and rows.
+    """
+
+    def __init__(self, conversion_type, input_path):
+        self.conversion_type = conversion_type
+        self.input_path = input_path
+        self.stages = {}
+        self.status = None
+        self.saved_path = None
+        self.started = None
+        self.seconds = 0.0
+        self.peak_memory = None
+        self._start = None
+        self._last = None
+        self._last_peak = None
+
+    def start(self):
+        self.started = datetime.now()
+        self._start = self._last = time.perf_counter()
+        self._last_peak = peak_memory()
+        return self
+
+    def record(self, stage, rows):
+        """Closes the running stage."""
+        now = time.perf_counter()
+        metrics = self.stages.setdefault(stage, StageMetrics(stage))
+        metrics.seconds += now - self._last
+        metrics.rows += rows
+        peak = peak_memory()
+        if peak is not None:
+            metrics.peak_memory = peak
+            metrics.memory_growth = (metrics.memory_growth or 0) + peak - self._last_peak
+        self._last = now
+        self._last_peak = peak
+
+    def finish(self, status, saved_path=None):
+        self.seconds = time.perf_counter() - self._start
+        self.status = status
+        self.saved_path = saved_path
+        self.peak_memory = peak_memory()
+
+    def summary_lines(self):
+        """Returns the lines for the logbook: one per stage, then the total."""
+        lines = [f"Metrics {self.conversion_type} - {stage}" for stage in self.stages.values()]
+        total = f"Metrics {self.conversion_type} - total: {self.seconds:.2f} s, {self.status}"
+        if self.peak_memory is not None:
+            total += f", peak {format_bytes(self.peak_memory)}"
+        lines.append(total)
+        return lines
+
+    def to_dict(self):
+        return {
+            "conversion_type": self.conversion_type,
+            "input_path": self.input_path,
+            "started": self.started.isoformat(timespec="seconds") if self.started else None,
+            "status": self.status,
+            "saved_path": self.saved_path,
+            "seconds": round(self.seconds, 4),
+            "peak_memory": self.peak_memory,
+            "stages": [stage.to_dict() for stage in self.stages.values()],
+        }
+
+    def write(self, folder):
+        """Writes the metrics as JSON to conversion_metrics.json in folder."""
+        metrics_file = os.path.join(folder, METRICS_FILE)
+        with open(metrics_file, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return metrics_file
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class NameCache:
+    """
+    Memoizes the normalization of names (raw -> normalized).
+    Every distinct name is normalized once per batch, and the results are kept in a CSV file so later runs only
+    normalize names they have not seen before.
+    """
+
+    def __init__(self, path, normalize):
+        self.path = path
+        self.normalize = normalize
+        self._names = None
+        self._new_names = {}
+
+    @property
+    def names(self):
+        if self._names is None:
+            self._names = self.load()
+        return self._names
+
+    def load(self):
+        """Reads the cache file, an empty cache when it does not exist or cannot be read."""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            cache_df = pd.read_csv(self.path, delimiter=';', encoding='utf-8', dtype=str, keep_default_na=False)
+        except (OSError, ValueError, pd.errors.ParserError):
+            return {}
+        return dict(zip(cache_df['Raw'], cache_df['Normalized']))
+
+    def invalidate(self):
+        """Forces the next lookup to read the cache file again, dropping names that were not saved."""
+        self._names = None
+        self._new_names = {}
+
+    def get(self, raw):
+        """Returns the normalized form of one value. Only strings are normalized and cached."""
+        if not isinstance(raw, str):
+            return self.normalize(raw)
+        normalized = self.names.get(raw)
+        if normalized is None:
+            normalized = self.normalize(raw)
+            self.names[raw] = normalized
+            self._new_names[raw] = normalized
+        return normalized
+
+    def normalize_series(self, series):
+        """Normalizes a Series by normalizing each distinct value once and mapping the results back."""
+        codes, uniques = pd.factorize(series)
+        values = np.empty(len(uniques) + 1, dtype=object)
+        values[:-1] = [self.get(raw) for raw in uniques]
+        values[-1] = np.nan  # factorize marks missing values with -1
+        return pd.Series(values[codes], index=series.index)
+
+    def take_new_names(self):
+        """Returns the names normalized since the last save and forgets them, for a caller that saves them itself."""
+        new_names, self._new_names = self._new_names, {}
+        return new_names
+
+    def add_names(self, names):
+        """Adds names normalized elsewhere, e.g. in a worker process, so the next save writes the unknown ones."""
+        for raw, normalized in names.items():
+            if raw not in self.names:
+                self.names[raw] = normalized
+                self._new_names[raw] = normalized
+
+    def save(self):
+        """Appends the names normalized since the last save to the cache file."""
+        if not self._new_names:
+            return
+        new_df = pd.DataFrame({'Raw': list(self._new_names), 'Normalized': list(self._new_names.values())})
+        write_header = not os.path.exists(self.path)
+        new_df.to_csv(self.path, mode='a', sep=';', index=False, header=write_header, encoding='utf-8')
+        self._new_names = {}
@@ -0,0 +1,62 @@
+import time
+
+import pandas as pd
+
+try:
+    import python_calamine  # noqa: F401
+    CALAMINE_AVAILABLE = True
+except ImportError:
+    CALAMINE_AVAILABLE = False
+
+ENGINE = None  # None picks calamine when it is installed, openpyxl otherwise
+
+
+class ReadTiming:
+    """How long one Excel file took to parse, and with which engine."""
+
+    def __init__(self, path, engine, rows, columns, seconds):
+        self.path = path
+        self.engine = engine
+        self.rows = rows
+        self.columns = columns
+        self.seconds = seconds
+
+    def __str__(self):
+        return f"Read {self.rows} rows x {self.columns} columns from {self.path} with {self.engine} in {self.seconds:.2f} s"
+
+
+def set_engine(engine):
+    """Forces an engine ('calamine' or 'openpyxl'), None restores the automatic choice."""
+    global ENGINE
+    ENGINE = engine
+
+
+def excel_engine():
+    if ENGINE is not None:
+        return ENGINE
+    return "calamine" if CALAMINE_AVAILABLE else "openpyxl"
+
+
+def read_excel(path, columns=None, **kwargs):
+    """
+    Reads an Excel file with the fastest available engine, falling back to openpyxl when calamine fails.
+    With columns, only those columns are parsed: a list of header names (names missing from the file are
+    ignored) or a list of column positions. Returns the DataFrame and its ReadTiming.
+    """
+    if columns is not None and all(isinstance(column, str) for column in columns):
+        wanted = set(columns)
+        kwargs["usecols"] = lambda name: str(name).strip() in wanted
+    elif columns is not None:
+        kwargs["usecols"] = columns
+
+    engine = excel_engine()
+    start = time.perf_counter()
+    try:
+        df = pd.read_excel(path, engine=engine, **kwargs)
+    except Exception:
+        if engine == "openpyxl":
+            raise
+        engine = "openpyxl"
+        df = pd.read_excel(path, engine=engine, **kwargs)
+
+    return df, ReadTiming(path, engine, len(df), len(df.columns), time.perf_counter() - start)
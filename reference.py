@@ -0,0 +1,301 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from fuzzy import FuzzyIndex
+from textrepair import MAX_CHARACTER_EXPANSION, REPLACEMENT_CHARACTER, lost_character_pattern, read_csv
+
+
+def read_relatiecodes(path):
+    """Reads the relatiecodes file, keeping 'Relatiecode' as text so leading zeros survive."""
+    return read_csv(path, delimiter=';', dtype={'Relatiecode': str})
+
+
+def read_grootboekrekeningen(path):
+    """Reads the grootboekrekeningen file with every column as text."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=['Code', 'Grootboekrekening'])
+    return read_csv(path, delimiter=';', dtype=str)
+
+
+class ReferenceFile:
+    """
+    A reference CSV file that is parsed on first use and kept in memory.
+    The cached DataFrame is invalidated when the mtime or size of the file changes, writes that go through
+    save() or append() update the cache directly.
+    """
+
+    def __init__(self, path, read):
+        self.path = path
+        self.read = read
+        self.version = 0
+        self._frame = None
+        self._signature = None
+
+    def signature(self):
+        """Returns (mtime, size) of the file, or None when it does not exist."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def frame(self):
+        """Returns the cached DataFrame, reading the file again only when it changed on disk."""
+        signature = self.signature()
+        if self._frame is None or signature != self._signature:
+            self._set(self.read(self.path), signature)
+        return self._frame
+
+    def invalidate(self):
+        """Forces the next frame() call to read the file again."""
+        self._frame = None
+        self._signature = None
+
+    def save(self, df):
+        """Writes the whole DataFrame to the file and keeps it as the cached frame."""
+        df.to_csv(self.path, sep=';', index=False, encoding='utf-8')
+        self._set(df, self.signature())
+
+    def append(self, rows):
+        """Appends rows to the file and to the cached frame without reading the file again."""
+        frame = self.frame()
+        with open(self.path, mode='a', newline='', encoding='utf-8') as f:
+            rows.to_csv(f, header=False, index=False, sep=';')
+        self._set(pd.concat([frame, rows], ignore_index=True), self.signature())
+
+    def update(self, edits):
+        """Applies edits from the reference editor, a list of ((key, code), (new key, new code)), and saves."""
+        df = self.frame().copy()
+        key, code = df.columns[:2]
+        for (old_key, old_code), (new_key, new_code) in edits:
+            df.loc[(df[key] == old_key) & (df[code] == old_code), [key, code]] = [new_key, new_code]
+        self.save(df)
+
+    def _set(self, df, signature):
+        self._frame = df
+        self._signature = signature
+        self.version += 1
+
+
+def changed_positions(left, right):
+    """Positions where two object arrays differ, where two missing values count as equal."""
+    positions = np.flatnonzero(left != right)
+    return positions[~(pd.isna(left[positions]) & pd.isna(right[positions]))]
+
+
+class ReferenceValidator:
+    """
+    Keeps the codes of every name of a reference file, to check that one name has only one code.
+    The result is cached against the version of the reference file. When the file changed, only the rows that were
+    appended or edited in place are checked again; the whole file is counted again only when rows were removed.
+    With normalize, names are compared in the form RelatiecodeIndex looks them up by, so 'Bedrijf A' and
+    'Bedrijf Ä' with different codes are a conflict.
+    """
+
+    def __init__(self, reference_file, key='Name', code='Relatiecode', normalize=None):
+        self.reference_file = reference_file
+        self.key = key
+        self.code = code
+        self.normalize = normalize
+        self._version = None
+        self._raw_keys = None
+        self._keys = None
+        self._codes = None
+        self._counts = {}
+        self._conflicts = set()
+
+    def conflicts(self):
+        """Returns the sorted names that have more than one code."""
+        reference_df = self.reference_file.frame()
+        if self._version != self.reference_file.version:
+            raw_keys = reference_df[self.key].to_numpy(dtype=object)
+            codes = reference_df[self.code].to_numpy(dtype=object)
+            if self._raw_keys is None or len(raw_keys) < len(self._raw_keys):
+                keys = self._normalized(raw_keys)
+                self._rebuild(keys, codes)
+            else:
+                # Only the names of edited and appended rows are normalized, the others keep their key
+                known = len(self._raw_keys)
+                renamed = changed_positions(raw_keys[:known], self._raw_keys)
+                edited = np.union1d(renamed, changed_positions(codes[:known], self._codes))
+                keys = np.empty(len(raw_keys), dtype=object)
+                keys[:known] = self._keys
+                normalized = np.concatenate((renamed, np.arange(known, len(raw_keys)))).astype(int)
+                keys[normalized] = self._normalized(raw_keys[normalized])
+                for position in edited:
+                    self._count(self._keys[position], self._codes[position], -1)
+                for position in np.concatenate((edited, np.arange(known, len(keys)))).astype(int):
+                    self._count(keys[position], codes[position], 1)
+            self._raw_keys = raw_keys
+            self._keys = keys
+            self._codes = codes
+            self._version = self.reference_file.version
+        return sorted(self._conflicts, key=str)
+
+    def _normalized(self, raw_keys):
+        """Normalizes an array of names, each distinct name once."""
+        if self.normalize is None:
+            return raw_keys.copy()
+        uniques = pd.unique(raw_keys)
+        return pd.Series(raw_keys, dtype=object).map(dict(zip(uniques, map(self.normalize, uniques)))).to_numpy(
+            dtype=object)
+
+    def _rebuild(self, keys, codes):
+        self._counts = {}
+        self._conflicts = set()
+        pairs = pd.DataFrame({'key': keys, 'code': codes}).dropna().value_counts()
+        for (key, code), count in pairs.items():
+            self._counts.setdefault(key, {})[code] = count
+        self._conflicts = {key for key, counts in self._counts.items() if len(counts) > 1}
+
+    def _count(self, key, code, step):
+        if pd.isna(key) or pd.isna(code):
+            return
+        counts = self._counts.setdefault(key, {})
+        counts[code] = counts.get(code, 0) + step
+        if counts[code] <= 0:
+            del counts[code]
+        if len(counts) > 1:
+            self._conflicts.add(key)
+        else:
+            self._conflicts.discard(key)
+            if not counts:
+                del self._counts[key]
+
+
+class RelatiecodeIndex:
+    """
+    Hash map from reference name to 'Relatiecode', built from the relatiecodes ReferenceFile.
+    New codes are added in place and appended to the file, so lookups never need a merge or a rescan.
+    The map is rebuilt only when the reference file itself changed.
+    With normalize, the reference names are normalized like the input names before they are used as keys.
+    """
+
+    def __init__(self, reference_file, normalize=None):
+        self.reference_file = reference_file
+        self.normalize = normalize
+        self._codes = None
+        self._patterns = []
+        self._version = None
+        self._fuzzy = None
+        self._fuzzy_version = None
+        self._normalized = {}  # Raw reference name -> key, so a changed file only normalizes its new names
+
+    @property
+    def codes(self):
+        reference_df = self.reference_file.frame()
+        if self._codes is None or self._version != self.reference_file.version:
+            names = reference_df['Name'].astype(object)
+            if self.normalize is not None:
+                normalized = self._normalized
+                for name in pd.unique(names.to_numpy()):
+                    if name not in normalized:
+                        normalized[name] = self.normalize(name)
+                names = names.map(normalized)
+            self._codes = dict(zip(names.to_numpy(), reference_df['Relatiecode'].to_numpy(dtype=object)))
+            # Names with characters lost to a wrong encoding are matched with a pattern instead
+            self._patterns = [(lost_character_pattern(name, MAX_CHARACTER_EXPANSION), code)
+                              for name, code in self._codes.items()
+                              if isinstance(name, str) and REPLACEMENT_CHARACTER in name]
+            self._version = self.reference_file.version
+        return self._codes
+
+    @property
+    def fuzzy(self):
+        """FuzzyIndex over the reference names, built on first use and rebuilt when the reference file changed."""
+        reference_df = self.reference_file.frame()
+        if self._fuzzy is None or self._fuzzy_version != self.reference_file.version:
+            self._fuzzy = FuzzyIndex(reference_df['Name'].astype(str), reference_df['Relatiecode'])
+            self._fuzzy_version = self.reference_file.version
+        return self._fuzzy
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, name):
+        return name in self.codes
+
+    def get(self, name, default=None):
+        return self.codes.get(name, default)
+
+    def lookup(self, names):
+        """Returns the 'Relatiecode' for every name in a Series, NaN where the name is unknown."""
+        self.match_lost_characters(names)
+        return names.map(self.codes)
+
+    def missing(self, names):
+        """Returns the unique names of a Series that have no 'Relatiecode' in the index."""
+        self.match_lost_characters(names)
+        codes = self.codes
+        return [name for name in names.unique() if name not in codes]
+
+    def match_lost_characters(self, names):
+        """
+        Maps the unknown names of a Series that match exactly one code of a reference name with lost characters.
+        The matches are kept in the map until the reference file changes, they are not written to the file.
+        """
+        codes = self.codes
+        if not self._patterns:
+            return
+        for name in names.unique():
+            if not isinstance(name, str) or name in codes:
+                continue
+            matched = {code for pattern, code in self._patterns if pattern.fullmatch(name)}
+            if len(matched) == 1:
+                codes[name] = matched.pop()
+
+    def add(self, name, code):
+        """Adds a new name to the index and appends it to the relatiecodes file."""
+        self.add_many({name: code})
+
+    def add_many(self, new_codes):
+        """Adds a dict name -> code to the index and appends it to the relatiecodes file in one write."""
+        if not new_codes:
+            return
+        codes = self.codes
+        self.reference_file.append(pd.DataFrame({'Name': list(new_codes), 'Relatiecode': list(new_codes.values())}))
+        codes.update(new_codes)
+        if self._fuzzy is not None and self._fuzzy_version == self._version:
+            for name, code in new_codes.items():
+                self._fuzzy.add(name, code)
+            self._fuzzy_version = self.reference_file.version
+        self._version = self.reference_file.version
+
+
+class ReferenceSearch:
+    """
+    Search index for the reference editor: the names are lowercased once, not on every search.
+    A query that extends the previous one only searches the previous matches, so search-as-you-type narrows fast.
+    """
+
+    def __init__(self, reference_df):
+        self.names = reference_df['Name'].astype(str).str.lower().reset_index(drop=True)
+        self.codes = reference_df['Relatiecode'].astype(str).reset_index(drop=True)
+        self._last = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, name="", code=""):
+        """Returns the positions of the rows whose name contains name (any case) and whose code contains code."""
+        name = name.strip().lower()
+        code = code.strip()
+        if self._last is not None and self._last[0] in name and self._last[1] in code:
+            rows = self._last[2]
+        else:
+            rows = np.arange(len(self.names))
+
+        if name:
+            rows = rows[self.names.iloc[rows].str.contains(name, regex=False).to_numpy()]
+        if code:
+            rows = rows[self.codes.iloc[rows].str.contains(code, regex=False).to_numpy()]
+        self._last = (name, code, rows)
+        return rows
+
+    def update(self, position, name, code):
+        """Updates one row after an edit."""
+        self.names.iat[position] = str(name).lower()
+        self.codes.iat[position] = str(code)
+        self._last = None
@@ -0,0 +1,200 @@
+"""
+SQLite store for the reference tables, as an alternative to relatiecodes.csv and grootboekrekeningen.csv.
+
+Each table has an indexed key and code column. Writes are upserts in a transaction, so adding or editing a code
+touches one row instead of rewriting a file. The tables can be imported from and exported to the CSV files:
+
+    python refstore.py import
+    python refstore.py export
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+
+import pandas as pd
+
+from textrepair import read_csv
+
+REFERENCE_DB_FILE = "reference.sqlite3"
+
+# Table name -> (key column, code column), with the column names of the CSV files
+TABLES = {
+    "relatiecodes": ("Name", "Relatiecode"),
+    "grootboekrekeningen": ("Code", "Grootboekrekening"),
+}
+CSV_FILES = {"relatiecodes": "relatiecodes.csv", "grootboekrekeningen": "grootboekrekeningen.csv"}
+
+
+def sql_rows(df):
+    """Returns the rows of a DataFrame as tuples for executemany, with None for missing values."""
+    return list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+
+class ReferenceDatabase:
+    """
+    One SQLite database file with the reference tables.
+    The connection is shared between threads behind a lock and opened again in a new process, so the same
+    object works from the GUI thread, the conversion thread and the batch workers.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self._connection = None
+        self._pid = None
+
+    def connection(self):
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._pid = os.getpid()
+            self._create_tables()
+        return self._connection
+
+    def _create_tables(self):
+        with self._connection:
+            for table, (key, code) in TABLES.items():
+                self._connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} ("{key}" TEXT PRIMARY KEY, "{code}" TEXT)')
+                self._connection.execute(f'CREATE INDEX IF NOT EXISTS {table}_code ON {table} ("{code}")')
+
+    def data_version(self):
+        """Changes whenever another connection commits to the database."""
+        with self.lock:
+            return self.connection().execute("PRAGMA data_version").fetchone()[0]
+
+    def table(self, table):
+        return ReferenceTable(self, table)
+
+
+class ReferenceTable:
+    """
+    A reference table in a ReferenceDatabase, with the same interface as reference.ReferenceFile.
+    The DataFrame is cached until another connection changes the database.
+    """
+
+    def __init__(self, database, table):
+        self.database = database
+        self.table = table
+        self.key, self.code = TABLES[table]
+        self.path = database.path
+        self.version = 0
+        self._frame = None
+        self._signature = None
+
+    def frame(self):
+        """Returns the table as a DataFrame with the columns of the CSV file, all values as text."""
+        signature = self.database.data_version()
+        if self._frame is None or signature != self._signature:
+            with self.database.lock:
+                rows = self.database.connection().execute(
+                    f'SELECT "{self.key}", "{self.code}" FROM {self.table} ORDER BY rowid').fetchall()
+            self._set(pd.DataFrame(rows, columns=[self.key, self.code], dtype=object), signature)
+        return self._frame
+
+    def invalidate(self):
+        self._frame = None
+        self._signature = None
+
+    def is_empty(self):
+        with self.database.lock:
+            return self.database.connection().execute(f"SELECT 1 FROM {self.table} LIMIT 1").fetchone() is None
+
+    def upsert(self, rows):
+        """
+        Inserts rows, or updates the code of rows whose key already exists. The last row of a key wins.
+        The cached DataFrame is updated in place, our own commits do not change the data version.
+        """
+        rows = rows[[self.key, self.code]]
+        with self.database.lock:
+            connection = self.database.connection()
+            with connection:
+                connection.executemany(
+                    f'INSERT INTO {self.table} ("{self.key}", "{self.code}") VALUES (?, ?) '
+                    f'ON CONFLICT("{self.key}") DO UPDATE SET "{self.code}" = excluded."{self.code}"', sql_rows(rows))
+        if self._frame is not None:
+            frame = pd.concat([self._frame, rows.astype(object)], ignore_index=True)
+            self._set(frame.drop_duplicates(subset=self.key, keep='last').reset_index(drop=True), self._signature)
+
+    def append(self, rows):
+        """Same as upsert, for the callers of ReferenceFile.append."""
+        self.upsert(rows)
+
+    def update(self, edits):
+        """
+        Applies edits from the reference editor, a list of ((key, code), (new key, new code)).
+        Only the edited rows are written. A rename to a key that already has another code would overwrite that
+        code, so it raises ValueError and none of the edits are saved.
+        """
+        collisions = []
+        with self.database.lock:
+            connection = self.database.connection()
+            with connection:
+                for (key, code), (new_key, new_code) in edits:
+                    if new_key != key:
+                        existing = connection.execute(
+                            f'SELECT "{self.code}" FROM {self.table} WHERE "{self.key}" = ?', (new_key,)).fetchone()
+                        if existing is not None and existing[0] != new_code:
+                            collisions.append(f"{new_key} ({existing[0]})")
+                            continue
+                    connection.execute(f'DELETE FROM {self.table} WHERE "{self.key}" = ? AND "{self.code}" = ?',
+                                       (key, code))
+                    connection.execute(
+                        f'INSERT INTO {self.table} ("{self.key}", "{self.code}") VALUES (?, ?) '
+                        f'ON CONFLICT("{self.key}") DO UPDATE SET "{self.code}" = excluded."{self.code}"',
+                        (new_key, new_code))
+                if collisions:
+                    # Raising inside the transaction rolls back the edits that were already applied
+                    raise ValueError(f"Renamed to names that already have another {self.code}: {collisions}")
+        self.invalidate()
+
+    def import_csv(self, path):
+        """
+        Upserts the rows of a reference CSV file into the table. The key is the primary key, so a name with more
+        than one code in the file would silently keep only the last one: those rows are refused instead.
+        Returns the number of rows stored and a DataFrame with the refused rows.
+        """
+        df = read_csv(path, delimiter=';', dtype=str)
+        df.columns = [self.key, self.code] + list(df.columns[2:])
+        rows = df[[self.key, self.code]].dropna(subset=[self.key]).drop_duplicates()
+        conflicting = rows[self.key].duplicated(keep=False)
+        self.upsert(rows[~conflicting])
+        return int((~conflicting).sum()), rows[conflicting]
+
+    def export_csv(self, path):
+        """Writes the table to a reference CSV file."""
+        self.frame().to_csv(path, sep=';', index=False, encoding='utf-8')
+        return path
+
+    def _set(self, df, signature):
+        self._frame = df
+        self._signature = signature
+        self.version += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import or export the reference tables of the SQLite store.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("--db", default=REFERENCE_DB_FILE, help="SQLite database file")
+    parser.add_argument("--folder", default=".", help="Folder with relatiecodes.csv and grootboekrekeningen.csv")
+    args = parser.parse_args(argv)
+
+    database = ReferenceDatabase(args.db)
+    for table, csv_file in CSV_FILES.items():
+        path = os.path.join(args.folder, csv_file)
+        if args.action == "import":
+            if os.path.exists(path):
+                stored, refused = database.table(table).import_csv(path)
+                print(f"Imported {stored} rows from {path}")
+                if not refused.empty:
+                    print(f"Refused {len(refused)} rows of names with more than one code:")
+                    print(refused.to_string(index=False))
+        else:
+            database.table(table).export_csv(path)
+            print(f"Exported {table} to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
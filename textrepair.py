@@ -0,0 +1,221 @@
+"""
+Detects the encoding of the reference CSV files and repairs names that a wrong encoding damaged.
+
+Two kinds of damage are repaired:
+- Mojibake, UTF-8 text that was read as cp1252 at some point: 'IMMOBILIÃ«N' becomes 'IMMOBILIËN' again.
+- Replacement characters, characters that were lost for good: 'Co�me' is restored when exactly one known name
+  matches it, a name from the same column or a raw input name from the normalized names file.
+
+The conversions apply the same repair when they normalize names, both to the input and to the reference names.
+The files themselves are repaired once with:
+
+    python textrepair.py relatiecodes.csv sgosjgir.csv
+
+The original files are kept as .bak, --check only reports what would change.
+"""
+import argparse
+import codecs
+import os
+import re
+import shutil
+import sys
+
+import pandas as pd
+import unidecode
+
+# Tried in this order, latin-1 decodes any byte so it always succeeds
+ENCODINGS = ["utf-8-sig", "cp1252", "latin-1"]
+DETECT_BLOCK_SIZE = 1 << 20
+REPLACEMENT_CHARACTER = "�"
+# UTF-8 text decoded as cp1252 shows these, e.g. 'Ã«' for 'ë' and 'â€“' for '–'
+MOJIBAKE_MARKERS = ("Ã", "Â", "â€")
+# unidecode writes one character as at most this many, 'ß' -> 'ss'
+MAX_CHARACTER_EXPANSION = 2
+MAX_REPAIR_ROUNDS = 3  # Text that went through a wrong encoding more than once needs a round per time
+
+
+def detect_encoding(path):
+    """Returns the first of ENCODINGS that decodes the whole file, reading it in blocks."""
+    for encoding in ENCODINGS[:-1]:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(DETECT_BLOCK_SIZE), b""):
+                    decoder.decode(block)
+                decoder.decode(b"", final=True)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return ENCODINGS[-1]
+
+
+def read_csv(path, **kwargs):
+    """pd.read_csv with the detected encoding of the file."""
+    return pd.read_csv(path, encoding=detect_encoding(path), **kwargs)
+
+
+def repair_text(text):
+    """Undoes UTF-8 that was decoded as cp1252, also when it happened more than once. Other values are kept."""
+    if not isinstance(text, str):
+        return text
+    for _ in range(MAX_REPAIR_ROUNDS):
+        if not any(marker in text for marker in MOJIBAKE_MARKERS):
+            break
+        try:
+            text = text.encode("cp1252").decode("utf-8")
+        except UnicodeError:
+            break
+    return text
+
+
+def clean_text(text):
+    """
+    Normalizes text by:
+    - Repairing mojibake with repair_text
+    - Removing accents or special characters using unidecode, replacement characters are kept so names with
+      lost characters can still be matched with lost_character_pattern
+    - Stripping leading/trailing whitespace
+    - Replacing special dashes with standard dashes
+
+    Args:
+        text (str): Input string to be cleaned and normalized.
+
+    Returns:
+        str: Cleaned and normalized string.
+    """
+    if isinstance(text, str):
+        text = repair_text(text)
+
+        # Remove accents and special characters
+        text = REPLACEMENT_CHARACTER.join(unidecode.unidecode(part) for part in text.split(REPLACEMENT_CHARACTER))
+
+        # Normalize by stripping whitespace and replacing non-standard dashes
+        return text.strip().replace("–", "-")
+
+    return text
+
+
+def lost_character_pattern(text, expansion=1):
+    """
+    Regex that matches text with every replacement character standing for 1 to expansion other characters.
+    Use expansion 1 to match raw names and MAX_CHARACTER_EXPANSION to match names normalized by clean_text.
+    """
+    parts = [re.escape(part) for part in text.split(REPLACEMENT_CHARACTER)]
+    return re.compile(f"\\S{{1,{expansion}}}".join(parts))
+
+
+class RepairResult:
+    """What repair_frame changed in one file."""
+
+    def __init__(self, path, encoding):
+        self.path = path
+        self.encoding = encoding
+        self.mojibake = 0
+        self.restored = []
+        self.unresolved = []
+        self.duplicates = 0
+
+    @property
+    def changed(self):
+        return self.encoding not in ("utf-8-sig", "utf-8") or self.mojibake or self.restored or self.duplicates
+
+    def summary_lines(self):
+        lines = [f"{self.path}: read as {self.encoding}, {self.mojibake} mojibake cells repaired, "
+                 f"{len(self.restored)} lost characters restored, {self.duplicates} duplicate rows dropped"]
+        lines += [f"  restored {old!r} -> {new!r}" for old, new in self.restored]
+        lines += [f"  could not restore {text!r}: {reason}" for text, reason in self.unresolved]
+        return lines
+
+
+def restore_lost_characters(text, known):
+    """
+    Returns the known text that text matches with its replacement characters, or None with the reason.
+    Matches that only differ in accents are the same name, the spelling with the accents is kept.
+    """
+    pattern = lost_character_pattern(text)
+    matches = sorted(candidate for candidate in known if pattern.fullmatch(candidate))
+    if not matches:
+        return None, "no known spelling"
+    if len({clean_text(match) for match in matches}) > 1:
+        return None, f"{len(matches)} possible spellings"
+    return max(matches, key=lambda match: match != clean_text(match)), None
+
+
+def repair_frame(df, result, known_names=()):
+    """
+    Repairs every text cell of df. Replacement characters in the first column are restored from the other values
+    of that column and known_names; a restored name that would get another code than an existing row is left
+    alone, the same rule validate_reference_file enforces. Exact duplicate rows are dropped.
+    """
+    df = df.copy()
+    for column in df.columns:
+        repaired = df[column].map(repair_text)
+        result.mojibake += int((repaired != df[column]).sum())
+        df[column] = repaired
+
+    key = df.columns[0]
+    code = df.columns[1] if len(df.columns) > 1 else None
+    damaged = df[key].str.contains(REPLACEMENT_CHARACTER, regex=False).to_numpy()
+    known = set(df.loc[~damaged, key]) | {name for name in known_names if REPLACEMENT_CHARACTER not in name}
+    existing = dict(zip(df.loc[~damaged, key], df.loc[~damaged, code])) if code else {}
+    for position in damaged.nonzero()[0]:
+        text = df.iat[position, 0]
+        restored, reason = restore_lost_characters(text, known)
+        if restored is not None and code and existing.get(restored, df.iat[position, 1]) != df.iat[position, 1]:
+            restored, reason = None, f"{restored!r} already has code {existing[restored]}"
+        if restored is None:
+            result.unresolved.append((text, reason))
+            continue
+        df.iat[position, 0] = restored
+        result.restored.append((text, restored))
+
+    rows = len(df)
+    df = df.drop_duplicates(ignore_index=True)
+    result.duplicates = rows - len(df)
+    return df
+
+
+def read_known_names(path):
+    """Raw input names of earlier conversions, from the normalized names file."""
+    if not path or not os.path.exists(path):
+        return []
+    return read_csv(path, delimiter=';', dtype=str, keep_default_na=False)['Raw'].tolist()
+
+
+def repair_file(path, known_names=(), write=True):
+    """Repairs one reference CSV file, keeping the original as .bak, and writes it back as UTF-8."""
+    result = RepairResult(path, detect_encoding(path))
+    df = pd.read_csv(path, delimiter=';', encoding=result.encoding, dtype=str, keep_default_na=False)
+    df = repair_frame(df, result, known_names)
+    if write and result.changed:
+        shutil.copyfile(path, path + ".bak")
+        df.to_csv(path, sep=';', index=False, encoding='utf-8')
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Repair the encoding of reference CSV files.")
+    parser.add_argument("files", nargs="+", help="Reference CSV files, repaired in place")
+    parser.add_argument("--names", default=None,
+                        help="Normalized names file with the raw input names of earlier conversions, "
+                             "by default the one of the converter")
+    parser.add_argument("--check", action="store_true", help="Only report what would be repaired")
+    args = parser.parse_args(argv)
+
+    if args.names is None:
+        from converter import NORMALIZED_NAMES_FILE
+        args.names = NORMALIZED_NAMES_FILE
+    known_names = read_known_names(args.names)
+    for path in args.files:
+        try:
+            result = repair_file(path, known_names, write=not args.check)
+        except (OSError, ValueError, pd.errors.ParserError) as e:
+            print(f"Error: {path}: {e}", file=sys.stderr)
+            return 1
+        for line in result.summary_lines():
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import numpy as np
+
+# Columns of the converted file that must be filled in
+REQUIRED_COLUMNS = ["boekjaar_boekjaar (H)", "dagboek_dagboek (H)", "factuur (H)", "periode_periode (H)",
+                    "btwregimes_btwregime (H)", "factdat (H)", "relaties_code (H)", "vervdat (H)",
+                    "valuta_code (H)", "tebet (H)", "statusfact_status (H)", "codefcbd_codefcbd (H)",
+                    "basis (H)", "btwtebet (H)", "boekhpl_reknr (D)", "datum (D)", "bedrag (D)", "btwcodes_btwcode (D)"]
+
+MAX_LOGGED_RANGES = 5
+FIRST_DATA_ROW = 2  # Excel row of the first data row, below the header
+
+
+def get_column_letter(col_idx):
+    """Convert a 1-based column index to an Excel-style column letter."""
+    col_letter = ''
+    while col_idx > 0:
+        col_idx, remainder = divmod(col_idx - 1, 26)
+        col_letter = chr(65 + remainder) + col_letter
+    return col_letter
+
+
+def row_ranges(rows):
+    """Collapses sorted row numbers into a list of (first, last) ranges."""
+    rows = np.asarray(rows)
+    if len(rows) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(rows) != 1)
+    starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+    ends = np.concatenate((rows[breaks], [rows[-1]]))
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def format_ranges(ranges, limit=None):
+    """Formats ranges as '2-5, 9, 12-40', with at most limit ranges."""
+    shown = ranges if limit is None else ranges[:limit]
+    text = ", ".join(str(first) if first == last else f"{first}-{last}" for first, last in shown)
+    if len(shown) < len(ranges):
+        text += f" and {len(ranges) - len(shown)} more ranges"
+    return text
+
+
+class MissingColumn:
+    """The empty cells of one column: its Excel letter, the number of empty cells and their row ranges."""
+
+    def __init__(self, column, letter, rows, exists=True):
+        self.column = column
+        self.letter = letter
+        self.rows = rows
+        self.exists = exists
+        self.ranges = row_ranges(rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def summary(self, limit=MAX_LOGGED_RANGES):
+        if not self.exists:
+            return f"Column '{self.column}' is missing ({len(self)} rows)"
+        return f"Column '{self.column}' ({self.letter}): {len(self)} empty cells in rows {format_ranges(self.ranges, limit)}"
+
+
+class MissingValuesReport:
+    """Empty cells per required column of a converted DataFrame, in Excel rows of the saved file."""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    @property
+    def total(self):
+        return sum(len(missing) for missing in self.columns.values())
+
+    def __bool__(self):
+        return self.total > 0
+
+    def summary_lines(self, limit=MAX_LOGGED_RANGES):
+        """One line per column with empty cells, with at most limit row ranges each."""
+        return [missing.summary(limit) for missing in self.columns.values() if len(missing)]
+
+    def detail_lines(self):
+        """One line per empty cell."""
+        lines = []
+        for missing in self.columns.values():
+            if not len(missing):
+                continue
+            if not missing.exists:
+                lines.append(missing.summary(limit=None))
+                continue
+            prefix = f"Missing value in column '{missing.column}' at cell {missing.letter}"
+            lines.extend(np.char.add(prefix, missing.rows.astype(str)).tolist())
+        return lines
+
+    def write(self, path):
+        """Writes the summary followed by every empty cell to path in one go."""
+        lines = self.summary_lines(limit=None)
+        if lines:
+            lines += [""] + self.detail_lines()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + ("\n" if lines else ""))
+        return path
+
+
+def find_missing_values(df, columns=REQUIRED_COLUMNS, filter_column=None):
+    """
+    Finds the empty cells (NaN or '') of the given columns with one mask over the whole DataFrame.
+    With filter_column, only rows where that column is filled in are checked. Returns a MissingValuesReport.
+    """
+    present = [column for column in columns if column in df.columns]
+    values = df[present]
+    mask = (values.isna() | values.eq('')).to_numpy(dtype=bool, na_value=True)
+
+    if filter_column:
+        populated = (df[filter_column].notna() & (df[filter_column] != '')).to_numpy()
+        mask &= populated[:, None]
+
+    excel_rows = np.arange(len(df)) + FIRST_DATA_ROW
+    missing_columns = {}
+    for column in columns:
+        if column in df.columns:
+            letter = get_column_letter(df.columns.get_loc(column) + 1)
+            rows = excel_rows[mask[:, present.index(column)]]
+            missing_columns[column] = MissingColumn(column, letter, rows)
+        else:
+            missing_columns[column] = MissingColumn(column, "Unknown", excel_rows, exists=False)
+    return MissingValuesReport(missing_columns)
+
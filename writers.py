@@ -0,0 +1,42 @@
+from openpyxl import Workbook
+
+from Document import DOCUMENT_COLUMNS
+
+CHUNK_SIZE = 10000
+
+
+def iter_chunks(df, chunk_size=CHUNK_SIZE):
+    """Yields the DataFrame in slices of chunk_size rows."""
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def chunk_rows(chunk):
+    """Returns the rows of a chunk as lists of plain cell values, with None for missing values."""
+    values = chunk.astype(object).where(chunk.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+def write_excel(df, path, chunk_size=CHUNK_SIZE):
+    """
+    Writes the DataFrame to an xlsx file with an openpyxl write-only workbook.
+    Rows are converted and streamed to disk chunk by chunk, so the workbook is never built in memory.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append([str(column) for column in df.columns])
+    for chunk in iter_chunks(df, chunk_size):
+        for row in chunk_rows(chunk):
+            sheet.append(row)
+    workbook.save(path)
+    return path
+
+
+def write_csv(df, path, decimal=",", encoding="utf-8", chunk_size=CHUNK_SIZE, columns=DOCUMENT_COLUMNS):
+    """
+    Writes the DataFrame as a semicolon separated CSV file for the accounting import, chunk by chunk.
+    Only the import columns are written, in their order; helper columns of the conversion are left out.
+    """
+    df = df.reindex(columns=columns)
+    df.to_csv(path, sep=';', decimal=decimal, index=False, encoding=encoding, chunksize=chunk_size)
+    return path